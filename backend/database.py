@@ -4,7 +4,14 @@ import datetime
 
 DB_NAME = "bowling.db"
 
+# DB_NAME values whose schema has been created; skips repeat CREATE TABLE passes.
+# Keyed by path so repointing DB_NAME still gets its tables.
+_INITIALIZED_DBS = set()
+
 def init_db():
+    if DB_NAME in _INITIALIZED_DBS:
+        return
+
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
     cursor.execute('''
@@ -34,6 +41,18 @@ def init_db():
     ''')
     conn.commit()
     conn.close()
+    _INITIALIZED_DBS.add(DB_NAME)
+
+def reset_db_for_tests():
+    """Drop all tables and re-create the schema (test helper)."""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS summaries")
+    cursor.execute("DROP TABLE IF EXISTS deliveries")
+    conn.commit()
+    conn.close()
+    _INITIALIZED_DBS.discard(DB_NAME)
+    init_db()
 
 def insert_summary(bowl_num: int, summary: str, speed_est: str, config: str):
     conn = sqlite3.connect(DB_NAME)
@@ -10,7 +10,9 @@ import uvicorn
 from database import init_db
 from rag import init_rag_index
 from agent import run_streamed_agent
+from utils import Deliveries, normalize_gemini_response
 
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from config import get_settings
 
@@ -30,6 +32,13 @@ logger = logging.getLogger("BowlingMate")
 logger.setLevel(log_level)
 logger.info(f"Logging initialized at level: {settings.LOG_LEVEL}")
 
+def _warm_storage():
+    try:
+        get_storage_service().warmup()
+        logger.info("Storage warmup complete.")
+    except Exception as e:
+        logger.warning(f"Storage warmup failed, will connect lazily: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
@@ -39,12 +48,17 @@ async def lifespan(app: FastAPI):
     
     init_db()
     init_rag_index()
+    # Open the GCS connection in the background; startup doesn't wait on it
+    asyncio.get_running_loop().run_in_executor(None, _warm_storage)
     yield
     # Shutdown
     logger.info("Shutdown complete.")
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
+# SSE responses: no caching, and tell nginx-style proxies not to buffer the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 # --- SECURITY MIDDLEWARE ---
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
@@ -274,7 +288,7 @@ async def test_overlay_stream(video_url: str = None):
             if os.path.exists(p):
                 os.remove(p)
 
-    return StreamingResponse(step_generator(), media_type="text/event-stream")
+    return StreamingResponse(step_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @app.post("/test-overlay")
@@ -489,23 +503,47 @@ import asyncio
 # In-memory store for pending analysis (Bypass Disk)
 analysis_cache = {}
 
-@app.post("/analyze")
-async def analyze_bowl(
-    video: UploadFile = File(...),
-    config: str = Form("club"),
-    language: str = Form("en")
-):
-    logger.info(f"Received analysis request: {video.filename} (Bypassing Disk)")
+def _stash_for_analysis(video_bytes: bytes) -> str:
+    """Hold the clip in analysis_cache for /stream-analysis; returns its video_id."""
     video_id = str(uuid.uuid4())
-    video_bytes = await video.read()
     analysis_cache[video_id] = video_bytes
-    
+
     # Auto-cleanup cache after 10 mins
     async def cleanup():
         await asyncio.sleep(600)
         analysis_cache.pop(video_id, None)
     asyncio.create_task(cleanup())
+    return video_id
+
+SSE_HEARTBEAT_S = 10.0
 
+async def _with_heartbeat(events, interval: float = SSE_HEARTBEAT_S):
+    """Pass SSE chunks through, adding a comment line whenever `events` stays quiet for `interval` seconds."""
+    it = events.__aiter__()
+    pending = asyncio.ensure_future(it.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield ": keep-alive\n\n"  # SSE comment; clients ignore it, idle timers reset
+                continue
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                return
+            yield chunk
+            pending = asyncio.ensure_future(it.__anext__())
+    finally:
+        pending.cancel()
+
+@app.post("/analyze")
+async def analyze_bowl(
+    video: UploadFile = File(...),
+    config: str = Form("club"),
+    language: str = Form("en")
+):
+    logger.info(f"Received analysis request: {video.filename} (Bypassing Disk)")
+    video_id = _stash_for_analysis(await video.read())
     return {"status": "accepted", "video_id": video_id}
 
 @app.get("/stream-analysis")
@@ -561,8 +599,50 @@ async def stream_analysis(video_id: str = None, video_path: str = None, config:
         if video_id and video_id in analysis_cache:
             analysis_cache.pop(video_id, None)
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    return StreamingResponse(_with_heartbeat(event_generator()), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+# Coach phase name (lowercased) -> joints to highlight per feedback category
+OVERLAY_JOINT_MAP = {
+    "run-up": {"good": ["RIGHT_KNEE", "LEFT_KNEE", "RIGHT_HIP", "LEFT_HIP"]},
+    "loading/coil": {"good": ["RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP"]},
+    "release action": {"injury_risk": ["RIGHT_ELBOW"], "good": ["RIGHT_WRIST"]},
+    "release": {"injury_risk": ["RIGHT_ELBOW"], "good": ["RIGHT_WRIST"]},
+    "wrist/snap": {"slow": ["RIGHT_WRIST"]},
+    "follow-through": {"slow": ["RIGHT_HIP"], "good": ["RIGHT_SHOULDER"]},
+    "head/eyes": {"slow": ["LEFT_SHOULDER"]}
+}
+
+# Normalized Coach status -> (feedback category, default joints) pairs to fill
+_STATUS_TO_CAT = {
+    "good": (("good", ["RIGHT_SHOULDER"]),),
+    "needs work": (("injury_risk", []), ("slow", ["RIGHT_SHOULDER"])),
+}
+_STATUS_TO_CAT["needs_work"] = _STATUS_TO_CAT["needs work"]
+
+# Shared placeholder for empty feedback categories (serializes as [])
+EMPTY_TUPLE = ()
+
+def _phases_to_feedback(phases_data: list, duration: float = 5.0) -> dict:
+    """Convert Coach phases into the timed feedback JSON read by mediapipe_overlay."""
+    feedback_phases = [None] * len(phases_data)
+    phase_duration = duration / max(len(phases_data), 1)
+
+    for i, p in enumerate(phases_data):
+        joints = OVERLAY_JOINT_MAP.get(p.get("name", "").lower(), {})
 
+        fb = {"good": EMPTY_TUPLE, "slow": EMPTY_TUPLE, "injury_risk": EMPTY_TUPLE}
+        for cat, default in _STATUS_TO_CAT.get(p.get("status", "").strip().lower(), EMPTY_TUPLE):
+            fb[cat] = joints.get(cat, default)
+
+        feedback_phases[i] = {
+            "start": i * phase_duration,
+            "end": (i + 1) * phase_duration,
+            "name": p.get("name", f"phase_{i}"),
+            "feedback": fb
+        }
+
+    return {"phases": feedback_phases}
 
 def _generate_overlay_sync(video_bytes: bytes, phases_data: list) -> str:
     """Sync function that does the actual overlay generation (blocking)."""
@@ -591,37 +671,7 @@ def _generate_overlay_sync(video_bytes: bytes, phases_data: list) -> str:
         return None  # Graceful fallback instead of exception
 
     # Convert phases to MediaPipe feedback
-    joint_map = {
-        "run-up": {"good": ["RIGHT_KNEE", "LEFT_KNEE", "RIGHT_HIP", "LEFT_HIP"]},
-        "loading/coil": {"good": ["RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP"]},
-        "release action": {"injury_risk": ["RIGHT_ELBOW"], "good": ["RIGHT_WRIST"]},
-        "release": {"injury_risk": ["RIGHT_ELBOW"], "good": ["RIGHT_WRIST"]},
-        "wrist/snap": {"slow": ["RIGHT_WRIST"]},
-        "follow-through": {"slow": ["RIGHT_HIP"], "good": ["RIGHT_SHOULDER"]},
-        "head/eyes": {"slow": ["LEFT_SHOULDER"]}
-    }
-
-    feedback = {"phases": []}
-    duration = 5.0
-    phase_duration = duration / max(len(phases_data), 1)
-
-    for i, p in enumerate(phases_data):
-        name = p.get("name", "").lower()
-        status = p.get("status", "").upper()
-
-        fb = {"good": [], "slow": [], "injury_risk": []}
-        if "GOOD" in status:
-            fb["good"] = joint_map.get(name, {}).get("good", ["RIGHT_SHOULDER"])
-        elif "NEEDS WORK" in status:
-            fb["injury_risk"] = joint_map.get(name, {}).get("injury_risk", [])
-            fb["slow"] = joint_map.get(name, {}).get("slow", ["RIGHT_SHOULDER"])
-
-        feedback["phases"].append({
-            "start": i * phase_duration,
-            "end": (i + 1) * phase_duration,
-            "name": p.get("name", f"phase_{i}"),
-            "feedback": fb
-        })
+    feedback = _phases_to_feedback(phases_data)
 
     # Save to temp files
     try:
@@ -704,9 +754,7 @@ async def detect_action(file: UploadFile = File(...)):
     Batch delivery detection: Scans video chunk for ALL bowling deliveries.
     Returns: {"found": bool, "deliveries_detected_at_time": [float], "total_count": int}
     """
-    import google.generativeai as genai
     import time
-    import tempfile
 
     request_id = f"REQ-{int(time.time()*1000)}"
     logger.info(f"[{request_id}] === DETECT-ACTION START === File: {file.filename}")
@@ -714,12 +762,44 @@ async def detect_action(file: UploadFile = File(...)):
     # 1. Read video bytes
     try:
         video_bytes = await file.read()
-        size_mb = len(video_bytes) / 1024 / 1024
-        logger.info(f"[{request_id}] Video: {size_mb:.2f}MB")
+        logger.info(f"[{request_id}] Video: {len(video_bytes) / 1024 / 1024:.2f}MB")
     except Exception as e:
         logger.error(f"[{request_id}] Read Error: {e}")
         return {"found": False, "deliveries_detected_at_time": [], "total_count": 0, "error": str(e)}
 
+    return await _detect_deliveries(video_bytes, request_id)
+
+
+@app.post("/scout-and-analyze")
+async def scout_and_analyze(file: UploadFile = File(...)):
+    """
+    /detect-action and /analyze from a single upload.
+    Returns the Scout result plus, when deliveries were found, a video_id for /stream-analysis.
+    """
+    import time
+
+    request_id = f"REQ-{int(time.time()*1000)}"
+    logger.info(f"[{request_id}] === SCOUT-AND-ANALYZE START === File: {file.filename}")
+    try:
+        video_bytes = await file.read()
+    except Exception as e:
+        logger.error(f"[{request_id}] Read Error: {e}")
+        return {"found": False, "deliveries_detected_at_time": [], "total_count": 0, "error": str(e)}
+
+    result = await _detect_deliveries(video_bytes, request_id)
+    if result.get("found"):
+        result["video_id"] = _stash_for_analysis(video_bytes)
+    return result
+
+
+async def _detect_deliveries(video_bytes: bytes, request_id: str) -> dict:
+    """Scout pass over the clip: {"found", "deliveries_detected_at_time", "total_count"}."""
+    import google.generativeai as genai
+    import time
+    import tempfile
+
+    size_mb = len(video_bytes) / 1024 / 1024
+
     # Mock mode - return actual Gemini response for 3sec_vid.mp4 (2026-02-08)
     if settings.MOCK_SCOUT:
         import time as time_module
@@ -810,65 +890,19 @@ async def detect_action(file: UploadFile = File(...)):
         # 5. Parse response
         result = json.loads(response.text)
 
-        # New format: {"found": bool, "deliveries_detected_at_time": [...], "total_count": int}
-        if "deliveries_detected_at_time" in result:
-            timestamps = result.get("deliveries_detected_at_time", [])
-            timestamps = sorted([float(t) for t in timestamps])  # Ensure sorted floats
-            final_response = {
-                "found": len(timestamps) > 0,
-                "deliveries_detected_at_time": timestamps,
-                "total_count": len(timestamps)
-            }
-            logger.info(f"[{request_id}] === DETECT-ACTION END === {final_response}")
-            return final_response
-
-        # Legacy format fallback: {"deliveries": [{timestamp, confidence}, ...]}
-        if "deliveries" in result:
-            deliveries = result.get("deliveries", [])
-            threshold = settings.SCOUT_CONFIDENCE_THRESHOLD
-            valid_timestamps = sorted([
-                float(d.get("timestamp", 0))
-                for d in deliveries
-                if d.get("confidence", 0) >= threshold
-            ])
-            final_response = {
-                "found": len(valid_timestamps) > 0,
-                "deliveries_detected_at_time": valid_timestamps,
-                "total_count": len(valid_timestamps)
-            }
-            logger.info(f"[{request_id}] === DETECT-ACTION END (legacy deliveries) === {final_response}")
-            return final_response
-
-        # Legacy list format: [{found, timestamp, confidence}, ...]
-        if isinstance(result, list):
-            threshold = settings.SCOUT_CONFIDENCE_THRESHOLD
-            valid_timestamps = sorted([
-                float(d.get("timestamp", 0))
-                for d in result
-                if d.get("found", True) and d.get("confidence", 0) >= threshold
-            ])
-            final_response = {
-                "found": len(valid_timestamps) > 0,
-                "deliveries_detected_at_time": valid_timestamps,
-                "total_count": len(valid_timestamps)
-            }
-            logger.info(f"[{request_id}] === DETECT-ACTION END (legacy list) === {final_response}")
-            return final_response
-
-        # Legacy single dict: {"found": bool, "timestamp": float, "confidence": float}
-        if result.get("found") and result.get("confidence", 0) >= settings.SCOUT_CONFIDENCE_THRESHOLD:
-            ts = float(result.get("timestamp", 0))
-            final_response = {
-                "found": True,
-                "deliveries_detected_at_time": [ts],
-                "total_count": 1
-            }
-            logger.info(f"[{request_id}] === DETECT-ACTION END (legacy single) === {final_response}")
-            return final_response
-
-        # No deliveries found
-        final_response = {"found": False, "deliveries_detected_at_time": [], "total_count": 0}
-        logger.info(f"[{request_id}] === DETECT-ACTION END (none found) === {final_response}")
+        # All response shapes (current + legacy) share one confidence filter
+        normalized = normalize_gemini_response(result)
+        timestamps = (
+            Deliveries.from_dicts(normalized["deliveries"])
+            .filter_confidence(settings.SCOUT_CONFIDENCE_THRESHOLD)
+            .sorted_timestamps()
+        )
+        final_response = {
+            "found": len(timestamps) > 0,
+            "deliveries_detected_at_time": timestamps,
+            "total_count": len(timestamps)
+        }
+        logger.info(f"[{request_id}] === DETECT-ACTION END === {final_response}")
         return final_response
 
     except Exception as e:
@@ -1025,36 +1059,7 @@ async def generate_overlay(
         phases_data = json.loads(phases)
 
         # Convert Coach phases to MediaPipe feedback format
-        joint_map = {
-            "run-up": {"good": ["RIGHT_KNEE", "LEFT_KNEE", "RIGHT_HIP", "LEFT_HIP"]},
-            "loading/coil": {"good": ["RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP"]},
-            "release action": {"injury_risk": ["RIGHT_ELBOW"], "good": ["RIGHT_WRIST"]},
-            "release": {"injury_risk": ["RIGHT_ELBOW"], "good": ["RIGHT_WRIST"]},
-            "wrist/snap": {"slow": ["RIGHT_WRIST"]},
-            "follow-through": {"slow": ["RIGHT_HIP"], "good": ["RIGHT_SHOULDER"]}
-        }
-
-        feedback = {"phases": []}
-        duration = 5.0
-        phase_duration = duration / max(len(phases_data), 1)
-
-        for i, p in enumerate(phases_data):
-            name = p.get("name", "").lower()
-            status = p.get("status", "").upper()
-
-            fb = {"good": [], "slow": [], "injury_risk": []}
-            if "GOOD" in status:
-                fb["good"] = joint_map.get(name, {}).get("good", ["RIGHT_SHOULDER"])
-            elif "NEEDS WORK" in status:
-                fb["injury_risk"] = joint_map.get(name, {}).get("injury_risk", [])
-                fb["slow"] = joint_map.get(name, {}).get("slow", ["RIGHT_SHOULDER"])
-
-            feedback["phases"].append({
-                "start": i * phase_duration,
-                "end": (i + 1) * phase_duration,
-                "name": p.get("name", f"phase_{i}"),
-                "feedback": fb
-            })
+        feedback = _phases_to_feedback(phases_data)
 
         # Save video to temp file
         video_bytes = await video.read()
@@ -1105,7 +1110,24 @@ async def generate_overlay(
 class ChatRequest(BaseModel):
     message: str
     delivery_id: str
-    phases: list  # List of phase dicts with name, status, clip_ts
+    phases: list | None = None  # Phase dicts (name, status, clip_ts); may be omitted after the first turn
+
+# delivery_id -> phases from the last chat turn that carried them (LRU)
+CHAT_PHASES_CACHE_SIZE = 256
+_chat_phases: "OrderedDict[str, list]" = OrderedDict()
+
+def _resolve_chat_phases(delivery_id: str, phases: list | None) -> list | None:
+    """Remember phases sent for a delivery, or recall them when a turn omits them."""
+    if phases is not None:
+        _chat_phases[delivery_id] = phases
+        _chat_phases.move_to_end(delivery_id)
+        if len(_chat_phases) > CHAT_PHASES_CACHE_SIZE:
+            _chat_phases.popitem(last=False)
+        return phases
+    phases = _chat_phases.get(delivery_id)
+    if phases is not None:
+        _chat_phases.move_to_end(delivery_id)
+    return phases
 
 class ChatResponse(BaseModel):
     text: str
@@ -1147,7 +1169,11 @@ async def chat_with_coach(request: ChatRequest):
     logger.info(f"[{request_id}] === CHAT START ===")
     logger.info(f"[{request_id}] Message: {request.message}")
     logger.info(f"[{request_id}] Delivery: {request.delivery_id}")
-    logger.info(f"[{request_id}] Phases count: {len(request.phases)}")
+    phases = _resolve_chat_phases(request.delivery_id, request.phases)
+    if phases is None:
+        # Client must resend with phases (e.g. after a backend restart)
+        raise HTTPException(status_code=409, detail="Unknown delivery_id; resend with phases")
+    logger.info(f"[{request_id}] Phases count: {len(phases)}{'' if request.phases is not None else ' (cached)'}")
 
     try:
         # Configure Gemini
@@ -1160,7 +1186,7 @@ async def chat_with_coach(request: ChatRequest):
 
         # Build context with phase timestamps
         phases_context = []
-        for p in request.phases:
+        for p in phases:
             clip_ts = p.get("clip_ts") or p.get("clipTimestamp")
             phases_context.append({
                 "name": p.get("name", "Unknown"),
@@ -8,7 +8,21 @@ overlay generation will be skipped gracefully.
 """
 import json
 import sys
+import queue
 import logging
+import threading
+from array import array
+from bisect import bisect_right
+from contextlib import closing
+
+import numpy as np
+
+# orjson is optional; stdlib json accepts the same bytes input
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 logger = logging.getLogger(__name__)
 
@@ -44,43 +58,124 @@ KEY_JOINTS = {
     'LEFT_ANKLE', 'RIGHT_ANKLE'
 }
 
+# Fixed joint order so per-phase colors can live in a (phases, joints, 3) table
+JOINT_ORDER = tuple(sorted(KEY_JOINTS))
+JOINT_ID = {name: i for i, name in enumerate(JOINT_ORDER)}
+
 GREEN = (0, 255, 0)
 YELLOW = (0, 255, 255)
 RED = (0, 0, 255)
 WHITE = (255, 255, 255)
+SCAN_GRAY = (180, 180, 180)
 
-def load_timed_feedback(json_path):
-    with open(json_path) as f:
-        return json.load(f)['phases']
+# Decoded frames buffered ahead of pose inference
+FRAME_QUEUE_SIZE = 32
 
-def get_phase_feedback(phases, timestamp):
-    """Get feedback for current timestamp."""
-    for idx, phase in enumerate(phases):
-        if phase['start'] <= timestamp < phase['end']:
-            return idx, phase['name'], phase['feedback']
-    return len(phases)-1, "done", {"good": [], "slow": [], "injury_risk": []}
+# One bit per JOINT_ORDER joint, and the palette indexed by color category
+# (0 = not drawn, 1 = good, 2 = slow, 3 = injury risk, 4 = scanning)
+_JOINT_BITS = np.uint16(1) << np.arange(len(JOINT_ORDER), dtype=np.uint16)
+_CATEGORY_COLORS = np.array([(0, 0, 0), GREEN, YELLOW, RED, SCAN_GRAY], np.uint8)
 
-def get_color(name, feedback, phase_idx):
-    """
-    Phase 0 (run_up): Show all joints in white (scanning)
-    Phase 1+: Only show joints with feedback, hide others
+def _joint_mask(joints):
+    """Pack a list of joint names into a JOINT_ORDER bitmask."""
+    return sum(1 << JOINT_ID[j] for j in joints if j in JOINT_ID)
+
+# Shared feedback for timestamps outside every phase (never mutated)
+EMPTY_FB = {"good": (), "slow": (), "injury_risk": ()}
+
+class PhaseIndex(list):
+    """Phases ordered by start time, with the starts kept in an array for bisect.
+
+    colors[i] / draw_mask[i] hold the BGR color and visibility of every
+    JOINT_ORDER joint for that phase, so a frame needs one row lookup; the
+    trailing row (index -1) is the "done" state, where nothing is drawn.
     """
-    in_feedback = (name in feedback.get('injury_risk', []) or
-                   name in feedback.get('slow', []) or
-                   name in feedback.get('good', []))
 
-    if phase_idx == 0:
-        # Scanning phase - show all as white/light
-        return (180, 180, 180)  # Light gray = "scanning"
+    def __init__(self, phases):
+        super().__init__(sorted(phases, key=lambda p: p['start']))
+        self.starts = array('d', (p['start'] for p in self))
+        # Priority injury > slow > good, resolved for all phases and joints
+        # at once from per-phase category bitmasks
+        feedback = [p['feedback'] for p in self] + [EMPTY_FB]
+        masks = np.array([
+            [_joint_mask(fb.get(cat, ())) for cat in ('injury_risk', 'slow', 'good')]
+            for fb in feedback
+        ], np.uint16)
+        hits = (masks[:, :, None] & _JOINT_BITS) != 0
+        category = np.select([hits[:, 0], hits[:, 1], hits[:, 2]], [3, 2, 1], 0)
+        if len(self):
+            category[0] = 4  # phase 0 is the scanning phase
+        self.colors = _CATEGORY_COLORS[category]
+        self.draw_mask = category != 0
 
-    if not in_feedback:
-        return None  # Don't draw
+def load_timed_feedback(json_path):
+    with open(json_path, 'rb') as f:
+        return PhaseIndex(_loads(f.read())['phases'])
 
-    if name in feedback.get('injury_risk', []):
-        return RED
-    if name in feedback.get('slow', []):
-        return YELLOW
-    return GREEN
+def get_phase_feedback(phases, timestamp):
+    """Get feedback for current timestamp from a PhaseIndex built once up front (O(log P) per frame)."""
+    idx = bisect_right(phases.starts, timestamp) - 1
+    if idx < 0 or timestamp >= phases[idx]['end']:
+        return -1, "done", EMPTY_FB
+    phase = phases[idx]
+    return idx, phase['name'], phase['feedback']
+
+def _rotate(frame, rotation_degrees):
+    """Apply rotation metadata (degrees to rotate to correct orientation)."""
+    if rotation_degrees == 90:
+        return cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    if rotation_degrees == 180:
+        return cv2.rotate(frame, cv2.ROTATE_180)
+    if rotation_degrees == 270:
+        return cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    return frame
+
+def _decoded_frames(cap, rotation_degrees):
+    """Yield rotated frames decoded on a background thread.
+
+    cv2 decode/rotate release the GIL, so reading the next frames overlaps
+    with pose inference and drawing on the caller's thread. Pose tracking
+    needs frames in order, so inference itself stays on one Pose instance.
+    The bounded queue caps how many decoded frames are held in memory.
+    """
+    frames = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+    stop = threading.Event()
+    errors = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def reader():
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                # Rotate frame BEFORE MediaPipe processing for better pose detection
+                put(_rotate(frame, rotation_degrees))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put(None)
+
+    thread = threading.Thread(target=reader, name="overlay-decode", daemon=True)
+    thread.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            yield frame
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+        thread.join()
 
 def process(input_path, feedback_path, output_path):
     """Generate overlay video with color-coded skeleton feedback.
@@ -159,22 +254,13 @@ def process(input_path, feedback_path, output_path):
         cap.release()
         raise RuntimeError(f"cv2.VideoWriter failed to create: {output_path}")
 
-    frame_num = 0
-    with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Rotate frame BEFORE MediaPipe processing for better pose detection
-            # Note: rotation metadata indicates how much to rotate to correct orientation
-            if rotation_degrees == 90:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-            elif rotation_degrees == 180:
-                frame = cv2.rotate(frame, cv2.ROTATE_180)
-            elif rotation_degrees == 270:
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    # (landmark index, JOINT_ID) for the key joints, resolved once instead of per frame
+    landmark_joints = [(mp_pose.PoseLandmark[name].value, JOINT_ID[name]) for name in JOINT_ORDER]
 
+    frame_num = 0
+    with mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5) as pose, \
+         closing(_decoded_frames(cap, rotation_degrees)) as frames:
+        for frame in frames:
             # Get actual frame dimensions after rotation
             frame_h, frame_w = frame.shape[:2]
 
@@ -183,7 +269,9 @@ def process(input_path, feedback_path, output_path):
                 logger.info(f"[MediaPipe] First frame after rotation: {frame_w}x{frame_h} (expected: {output_w}x{output_h})")
 
             timestamp = frame_num / fps
-            phase_idx, phase_name, feedback = get_phase_feedback(phases, timestamp)
+            phase_idx, phase_name, _ = get_phase_feedback(phases, timestamp)
+            joint_colors = phases.colors[phase_idx].tolist()
+            draw_mask = phases.draw_mask[phase_idx]
 
             results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
 
@@ -223,21 +311,18 @@ def process(input_path, feedback_path, output_path):
                             (int(p2.x*frame_w), int(p2.y*frame_h)), line_color, line_width)
 
                 # Draw color-coded joints (only key joints)
-                for idx, lm in enumerate(landmarks):
-                    name = mp_pose.PoseLandmark(idx).name
-                    if name not in KEY_JOINTS:
-                        continue
-                    color = get_color(name, feedback, phase_idx)
-                    if color is None:
+                for lm_idx, joint_id in landmark_joints:
+                    if not draw_mask[joint_id]:
                         continue  # Skip joints without feedback
+                    lm = landmarks[lm_idx]
                     x, y = int(lm.x * frame_w), int(lm.y * frame_h)
 
                     # Debug first joint on first frame
-                    if frame_num == 0 and idx == 11:  # Left shoulder
+                    if frame_num == 0 and lm_idx == 11:  # Left shoulder
                         logger.info(f"[MediaPipe] Drawing left shoulder at pixel coords: ({x}, {y}), frame size: {frame_w}x{frame_h}")
 
                     size = 5 if phase_idx == 0 else 8  # Increase sizes for visibility
-                    cv2.circle(frame, (x, y), size, color, -1)
+                    cv2.circle(frame, (x, y), size, tuple(joint_colors[joint_id]), -1)
 
             # Slow down on feedback phases (repeat frames)
             if phase_idx == 0:
@@ -1,3 +1,9 @@
+from functools import lru_cache
+
+# Stand-in for release_ts while building the cached analysis prompt
+_TS_SLOT = "\x00release_ts\x00"
+
+@lru_cache(maxsize=32)
 def get_multi_bowl_detection_prompt(config: str, language: str) -> str:
     return f"""
     Analyze this cricket bowling video for a {config} level player in {language}.
@@ -20,7 +26,13 @@ def get_multi_bowl_detection_prompt(config: str, language: str) -> str:
     """
 
 def get_analysis_prompt(config: str, language: str, release_ts: float) -> str:
-    return f"""
+    return f"{release_ts}".join(_analysis_prompt_parts(config, language))
+
+@lru_cache(maxsize=64)
+def _analysis_prompt_parts(config: str, language: str) -> tuple:
+    """Analysis prompt split around release_ts, built once per (config, language)."""
+    release_ts = _TS_SLOT
+    return tuple(f"""
 Analyze this cricket bowling delivery. Release point is at {release_ts}s.
 
 Setting: Any — backyard, park, indoor, net session. Shadow bowling (no ball) is valid.
@@ -59,4 +71,4 @@ OUTPUT (JSON only):
   "summary": "One sentence: biggest strength + priority fix",
   "release_timestamp": {release_ts}
 }}
-    """
+    """.split(_TS_SLOT))
@@ -1,4 +1,5 @@
 from typing import List
+from functools import lru_cache
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
@@ -24,11 +25,12 @@ import logging
 
 logger = logging.getLogger("BowlingMate.rag")
 
-_vector_store = None
+# One FAISS index per language, so searches never return wrong-language hits
+_vector_stores: dict = {}
 
 def init_rag_index():
-    global _vector_store
-    if _vector_store is not None:
+    global _vector_stores
+    if _vector_stores:
         return
 
     logger.debug("Initializing RAG Index...")
@@ -47,25 +49,33 @@ def init_rag_index():
             model=settings.EMBEDDING_MODEL_NAME,
             google_api_key=settings.GOOGLE_API_KEY
         )
-        _vector_store = FAISS.from_documents(documents, embeddings)
-        logger.info(f"RAG Index initialized with {len(documents)} documents.")
+        by_lang = {}
+        for doc in documents:
+            by_lang.setdefault(doc.metadata["lang"], []).append(doc)
+        _vector_stores = {
+            lang: FAISS.from_documents(docs, embeddings) for lang, docs in by_lang.items()
+        }
+        logger.info(f"RAG Index initialized with {len(documents)} documents across {len(_vector_stores)} languages.")
     except Exception as e:
         logger.warning(f"RAG initialization failed (likely no API key): {e}")
-        _vector_store = None
+        _vector_stores = {}
+    finally:
+        # Cached results belong to the previous index
+        retrieve_knowledge.cache_clear()
 
+@lru_cache(maxsize=256)
 def retrieve_knowledge(query: str, language: str = "en", k: int = 3) -> str:
+    """Cached by (query, language, k); coaching queries repeat across analyses."""
+    return _retrieve_knowledge_uncached(query, language, k)
+
+def _retrieve_knowledge_uncached(query: str, language: str, k: int) -> str:
     logger.debug(f"Retrieving knowledge for query: '{query}' [lang={language}]")
-    if _vector_store is None:
-        logger.warning("Vector store is not initialized. Returning empty.")
+    store = _vector_stores.get(language)
+    if store is None:
+        logger.warning(f"No vector store for lang={language}. Returning empty.")
         return ""
-    
-    # Filter by language if possible
-    # FAISS in langchain doesn't support metadata filtering easily in the search method 
-    # without specific vector store kwargs, or post-filtering. 
-    # For MVP, we'll just search and let the LLM filter, or retrieve more docs.
-    results = _vector_store.similarity_search(query, k=k*2) # over-fetch
-    
-    filtered = [doc.page_content for doc in results if doc.metadata.get("lang") == language]
-    logger.debug(f"Found {len(results)} raw matches, filtered to {len(filtered)} by language.")
-    
-    return "\n".join(filtered[:k])
+
+    results = store.similarity_search(query, k=k)
+    logger.debug(f"Found {len(results)} matches.")
+
+    return "\n".join(doc.page_content for doc in results)
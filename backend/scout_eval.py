@@ -0,0 +1,22 @@
+"""
+Scout evaluation helpers: compare detected delivery timestamps against
+recorded ground truth.
+"""
+from bisect import bisect_left
+
+
+def unmatched_timestamps(expected, detected, tolerance: float) -> list:
+    """
+    Returns the expected timestamps with no detection within ±tolerance.
+
+    Sorts `detected` once and binary-searches each expected timestamp, so a
+    full comparison is O((E + D) log D) instead of O(E × D).
+    """
+    detected_sorted = sorted(detected)
+    missed = []
+    for e in expected:
+        i = bisect_left(detected_sorted, e)
+        neighbours = detected_sorted[max(0, i - 1):i + 1]
+        if not any(abs(d - e) <= tolerance for d in neighbours):
+            missed.append(e)
+    return missed
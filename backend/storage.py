@@ -5,7 +5,8 @@ Handles upload, download, thumbnail generation, and signed URL creation.
 import os
 import subprocess
 import logging
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import BinaryIO, Optional, Tuple, Union
 from datetime import timedelta
 from google.cloud import storage
 from google.auth import compute_engine
@@ -17,6 +18,9 @@ from config import get_settings
 logger = logging.getLogger("BowlingMate.storage")
 settings = get_settings()
 
+# Shared pool so video and thumbnail PUTs overlap instead of running back to back
+_UPLOAD_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gcs-upload")
+
 
 class GCSStorageService:
     """Handles all GCS operations for BowlingMate clips."""
@@ -66,6 +70,10 @@ class GCSStorageService:
                 self._bucket = self.client.create_bucket(self.bucket_name, location="us-central1")
         return self._bucket
     
+    def warmup(self) -> None:
+        """Materialize the client and bucket up front (auth, DNS, TLS) so the first upload doesn't pay for it."""
+        _ = self.bucket
+
     def generate_thumbnail(self, video_path: str, output_path: str) -> bool:
         """Generate a thumbnail from video using ffmpeg."""
         try:
@@ -83,28 +91,40 @@ class GCSStorageService:
             logger.error(f"Thumbnail generation failed: {e}")
             return False
     
-    def upload_clip(self, local_path: str, delivery_id: str, base_url: str = "") -> Tuple[str, str]:
+    def upload_clip(self, local_path: Union[str, BinaryIO], delivery_id: str, base_url: str = "") -> Tuple[str, str]:
         """
         Upload video clip and thumbnail to GCS.
+        local_path may also be a binary file object (e.g. BytesIO); those are
+        streamed as-is and get no thumbnail, since ffmpeg needs a real file.
         Returns: (video_proxy_url, thumbnail_proxy_url)
         """
-        # Upload video
+        is_path = isinstance(local_path, (str, os.PathLike))
+
+        # Start the video upload, then build the thumbnail while it is in flight
         video_blob_name = f"clips/{delivery_id}.mp4"
         video_blob = self.bucket.blob(video_blob_name)
-        video_blob.upload_from_filename(local_path, content_type="video/mp4")
-        logger.info(f"Uploaded video to gs://{self.bucket_name}/{video_blob_name}")
+        upload = video_blob.upload_from_filename if is_path else video_blob.upload_from_file
+        uploads = [_UPLOAD_POOL.submit(upload, local_path, content_type="video/mp4")]
 
-        # Generate and upload thumbnail
-        thumb_path = local_path.replace(".mp4", "_thumb.jpg")
+        thumb_path = os.fspath(local_path).replace(".mp4", "_thumb.jpg") if is_path else None
         thumb_url = ""
-        if self.generate_thumbnail(local_path, thumb_path):
+        thumb_blob_name = None
+        if is_path and self.generate_thumbnail(local_path, thumb_path):
             thumb_blob_name = f"thumbs/{delivery_id}.jpg"
             thumb_blob = self.bucket.blob(thumb_blob_name)
-            thumb_blob.upload_from_filename(thumb_path, content_type="image/jpeg")
+            uploads.append(_UPLOAD_POOL.submit(thumb_blob.upload_from_filename, thumb_path, content_type="image/jpeg"))
+
+        wait(uploads)
+        try:
+            for future in uploads:
+                future.result()  # re-raise upload errors
+        finally:
+            if thumb_blob_name and os.path.exists(thumb_path):
+                os.remove(thumb_path)
+        logger.info(f"Uploaded video to gs://{self.bucket_name}/{video_blob_name}")
+        if thumb_blob_name:
             thumb_url = f"{base_url}/media/thumb/{delivery_id}" if base_url else ""
             logger.info(f"Uploaded thumbnail to gs://{self.bucket_name}/{thumb_blob_name}")
-            if os.path.exists(thumb_path):
-                os.remove(thumb_path)
 
         video_url = f"{base_url}/media/video/{delivery_id}" if base_url else ""
         logger.info(f"Returning proxy URLs: video={video_url}, thumb={thumb_url}")
@@ -0,0 +1,63 @@
+"""
+Reusable stand-ins for the backend's external collaborators (settings,
+Gemini, GCS), one class per collaborator.
+"""
+import json
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+
+class MockSettings(SimpleNamespace):
+    """Plain-attribute settings (no MagicMock child-mock machinery)."""
+
+    DEFAULTS = {"GCS_BUCKET_NAME": "test-bucket", "GCS_CREDENTIALS_PATH": None}
+
+    def __init__(self, **overrides):
+        super().__init__(**{**self.DEFAULTS, **overrides})
+
+
+class MockGemini:
+    """
+    The google.generativeai surface the backend touches: configure,
+    GenerativeModel, upload_file and get_file.
+    """
+
+    def __init__(self, response, file_state: str = "ACTIVE"):
+        text = response if isinstance(response, str) else json.dumps(response)
+        self.model = MagicMock()
+        self.model.generate_content.return_value = MagicMock(text=text)
+        # MagicMock(name=...) names the mock itself, so .name is assigned explicitly
+        self.file = MagicMock()
+        self.file.state.name = file_state
+        self.file.name = "files/test_video"
+
+    def install(self, monkeypatch, module: str = "google.generativeai") -> "MockGemini":
+        monkeypatch.setattr(f"{module}.configure", lambda *a, **kw: None)
+        monkeypatch.setattr(f"{module}.GenerativeModel", lambda *a, **kw: self.model)
+        monkeypatch.setattr(f"{module}.upload_file", lambda *a, **kw: self.file)
+        monkeypatch.setattr(f"{module}.get_file", lambda *a, **kw: self.file)
+        return self
+
+
+@lru_cache(maxsize=None)
+def _gcs_spec(name: str) -> list:
+    from google.cloud import storage as gcs
+
+    return dir(getattr(gcs, name))
+
+
+class MockGCSService:
+    """GCS client -> bucket -> blob chain, each specced to the real class."""
+
+    @staticmethod
+    def spec(name: str) -> list:
+        """Attribute list of google.cloud.storage.<name>, introspected once."""
+        return _gcs_spec(name)
+
+    def __init__(self):
+        self.blob = MagicMock(spec=self.spec("Blob"))
+        self.bucket = MagicMock(spec=self.spec("Bucket"))
+        self.bucket.blob.return_value = self.blob
+        self.client = MagicMock(spec=self.spec("Client"))
+        self.client.get_bucket.return_value = self.bucket
@@ -1,7 +1,95 @@
 import os
+import json
+import sys
+import pathlib
 import pytest
+from unittest.mock import MagicMock
+
+# Make backend modules importable from every test (single path mutation)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from tests._mocks import MockGemini
 
 # Set required env vars for testing
 os.environ.setdefault("GOOGLE_API_KEY", "test-api-key")
 os.environ.setdefault("API_SECRET", "bowlingmate-hackathon-secret")
 os.environ.setdefault("GCS_BUCKET_NAME", "test-bucket")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _db(tmp_path_factory):
+    """Give each xdist worker its own SQLite file and create the schema once."""
+    import database
+
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "master")
+    db_path = tmp_path_factory.getbasetemp() / f"bowling_{worker_id}.db"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, "DB_NAME", str(db_path))
+        database.reset_db_for_tests()
+        yield
+
+
+@pytest.fixture(autouse=True)
+def no_subprocess(monkeypatch):
+    """Never shell out to ffmpeg or really sleep; yields the subprocess.run mock."""
+    run = MagicMock(return_value=MagicMock(returncode=0))
+    monkeypatch.setattr("subprocess.run", run)
+    monkeypatch.setattr("time.sleep", lambda *_: None)
+    return run
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One authenticated TestClient for the whole session."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app, headers={"Authorization": f"Bearer {os.environ['API_SECRET']}"})
+
+
+@pytest.fixture(scope="session")
+def client_no_auth():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _clear_analysis_cache():
+    """Keep the session clients isolated: drop uploads cached by the previous test."""
+    yield
+    main = sys.modules.get("main")
+    if main is not None:
+        main.analysis_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def mock_gemini_coach_response():
+    """Raw Coach JSON in the shape the analysis prompt asks Gemini for (shared; treat as read-only)."""
+    return {
+        "summary": "Solid action with a smooth run-up; keep the front arm higher at release.",
+        "estimated_speed_kmh": 118,
+        "release_timestamp": 3.0,
+        "effort": "Medium",
+        "phases": [
+            {"name": "Run-up", "status": "GOOD", "observation": "Rhythmic approach.", "tip": "Keep the same stride length."},
+            {"name": "Loading/Coil", "status": "GOOD", "observation": "Side-on at back-foot contact.", "tip": None},
+            {"name": "Release Action", "status": "NEEDS WORK", "observation": "Front arm drops early.", "tip": "Pull the front arm down later."},
+            {"name": "Wrist/Snap", "status": "GOOD", "observation": "Upright seam.", "tip": None},
+            {"name": "Head/Eyes", "status": "GOOD", "observation": "Eyes level on the target.", "tip": None},
+            {"name": "Follow-through", "status": "NEEDS WORK", "observation": "Stops short after release.", "tip": "Carry through past the front leg."},
+        ],
+    }
+
+
+@pytest.fixture(scope="session")
+def mock_gemini_response_text(mock_gemini_coach_response):
+    """The Coach response serialized once per session."""
+    return json.dumps(mock_gemini_coach_response)
+
+
+@pytest.fixture
+def mock_gemini(monkeypatch, mock_gemini_response_text):
+    """Swap in one GenerativeModel stand-in returning the Coach response; yields the model mock."""
+    return MockGemini(mock_gemini_response_text).install(monkeypatch).model
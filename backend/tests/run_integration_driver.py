@@ -0,0 +1,50 @@
+"""
+CLI runner for the integration driver (kept out of the pytest module).
+
+Usage:
+    # Test against local backend
+    python tests/run_integration_driver.py
+
+    # Test against deployed backend
+    BACKEND_URL=https://your-backend.run.app python tests/run_integration_driver.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import test_integration_driver as driver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backend Integration Test Driver")
+    parser.add_argument("--url", default=driver.BACKEND_URL, help="Backend URL")
+    parser.add_argument("--video", default=str(driver.TEST_VIDEO_PATH), help="Video file path")
+    parser.add_argument("--scout-only", action="store_true", help="Only test Scout detection")
+    args = parser.parse_args()
+
+    # Override driver globals
+    driver.BACKEND_URL = args.url
+    if args.video:
+        driver.TEST_VIDEO_PATH = Path(args.video)
+
+    print(f"Backend URL: {driver.BACKEND_URL}")
+    print(f"Test Video: {driver.TEST_VIDEO_PATH}")
+    print(f"Video exists: {driver.TEST_VIDEO_PATH.exists()}")
+
+    if not driver.TEST_VIDEO_PATH.exists():
+        print("❌ Test video not found!")
+        sys.exit(1)
+
+    # Run tests
+    test_scout = driver.TestScoutDetection()
+    result = test_scout.test_detect_action_with_real_video()
+
+    if not args.scout_only:
+        test_pipeline = driver.TestFullPipeline()
+        asyncio.run(test_pipeline.test_complete_flow())
@@ -141,3 +141,33 @@ class TestPhaseTimestampExtraction:
                 assert clip_ts == 2.0
             else:
                 assert clip_ts is None
+
+
+class TestChatPhaseCache:
+    """Phases are sent once per delivery and recalled on later turns."""
+
+    def test_phases_recalled_when_omitted(self):
+        """A turn without phases gets the ones last sent for that delivery."""
+        from main import _resolve_chat_phases
+
+        phases = [{"name": "Release", "status": "GOOD", "clip_ts": 2.0}]
+        assert _resolve_chat_phases("cache-test-1", phases) is phases
+        assert _resolve_chat_phases("cache-test-1", None) is phases
+
+    def test_resent_phases_replace_cached(self):
+        """Sending phases again overwrites the cached copy."""
+        from main import _resolve_chat_phases
+
+        _resolve_chat_phases("cache-test-2", [{"name": "Run-up"}])
+        newer = [{"name": "Release"}]
+        _resolve_chat_phases("cache-test-2", newer)
+        assert _resolve_chat_phases("cache-test-2", None) is newer
+
+    def test_unknown_delivery_without_phases_conflicts(self, client):
+        """409 tells the client to resend the turn with phases."""
+        response = client.post(
+            "/chat",
+            json={"message": "How was my release?", "delivery_id": "never-seen"}
+        )
+
+        assert response.status_code == 409
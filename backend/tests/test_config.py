@@ -8,27 +8,13 @@ class TestSettings:
     """Tests for application settings."""
 
     @pytest.fixture(autouse=True)
-    def setup_env(self):
-        """Set up required environment variables for tests."""
-        # Store original env
-        original_key = os.environ.get("GOOGLE_API_KEY")
-
-        # Set test value
-        os.environ["GOOGLE_API_KEY"] = "test-api-key-for-testing"
-
-        # Clear cached settings
+    def setup_env(self, monkeypatch):
+        """Set up required environment variables for tests (undone by monkeypatch)."""
         from config import get_settings
-        get_settings.cache_clear()
 
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-api-key-for-testing")
+        get_settings.cache_clear()
         yield
-
-        # Restore original env
-        if original_key:
-            os.environ["GOOGLE_API_KEY"] = original_key
-        elif "GOOGLE_API_KEY" in os.environ:
-            del os.environ["GOOGLE_API_KEY"]
-
-        # Clear cache again
         get_settings.cache_clear()
 
     def test_settings_loads(self):
@@ -64,9 +50,11 @@ class TestSettings:
         # Should return same cached instance
         assert settings1 is settings2
 
-    def test_gcs_config(self):
+    def test_gcs_config(self, monkeypatch):
         """Test GCS configuration defaults."""
         from config import Settings
+        # conftest points GCS_BUCKET_NAME at a test bucket; check the real default
+        monkeypatch.delenv("GCS_BUCKET_NAME", raising=False)
         settings = Settings()
 
         assert settings.GCS_BUCKET_NAME == "bowlingmate-clips"
@@ -127,21 +115,13 @@ class TestConfidenceThreshold:
     """Tests for confidence threshold configuration."""
 
     @pytest.fixture(autouse=True)
-    def setup_env(self):
-        """Set up required environment variables for tests."""
-        original_key = os.environ.get("GOOGLE_API_KEY")
-        os.environ["GOOGLE_API_KEY"] = "test-api-key-for-testing"
-
+    def setup_env(self, monkeypatch):
+        """Set up required environment variables for tests (undone by monkeypatch)."""
         from config import get_settings
-        get_settings.cache_clear()
 
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-api-key-for-testing")
+        get_settings.cache_clear()
         yield
-
-        if original_key:
-            os.environ["GOOGLE_API_KEY"] = original_key
-        elif "GOOGLE_API_KEY" in os.environ:
-            del os.environ["GOOGLE_API_KEY"]
-
         get_settings.cache_clear()
 
     def test_threshold_in_valid_range(self):
@@ -165,28 +145,13 @@ class TestSettingsOverride:
     """Tests for settings override via environment variables."""
 
     @pytest.fixture(autouse=True)
-    def setup_env(self):
-        """Set up environment with overrides."""
-        original_env = {
-            "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY"),
-            "SCOUT_CONFIDENCE_THRESHOLD": os.environ.get("SCOUT_CONFIDENCE_THRESHOLD"),
-            "APP_NAME": os.environ.get("APP_NAME"),
-        }
-
-        os.environ["GOOGLE_API_KEY"] = "test-api-key-for-testing"
-
+    def setup_env(self, monkeypatch):
+        """Set up required environment variables for tests (undone by monkeypatch)."""
         from config import get_settings
-        get_settings.cache_clear()
 
+        monkeypatch.setenv("GOOGLE_API_KEY", "test-api-key-for-testing")
+        get_settings.cache_clear()
         yield
-
-        # Restore
-        for key, value in original_env.items():
-            if value is not None:
-                os.environ[key] = value
-            elif key in os.environ:
-                del os.environ[key]
-
         get_settings.cache_clear()
 
     def test_threshold_can_be_overridden(self):
@@ -250,12 +250,28 @@ class TestDatabaseInit:
 
     def test_init_db_idempotent(self):
         """Test that init_db can be called multiple times safely."""
-        # Should not raise any errors
-        init_db()
+        import database
+
+        # Should not raise any errors; repeat calls short-circuit on the flag
         init_db()
         init_db()
+        assert database.DB_NAME in database._INITIALIZED_DBS
 
         # Tables should still work
         insert_summary(999, "Idempotent test", "0", "club")
         summaries = get_summaries()
         assert any(s['summary'] == "Idempotent test" for s in summaries)
+
+    def test_init_db_after_repointing_db_name(self, tmp_path, monkeypatch):
+        """A new DB_NAME gets its schema even after another path was initialized."""
+        import sqlite3
+        import database
+
+        init_db()
+        monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "other.db"))
+        init_db()
+
+        conn = sqlite3.connect(database.DB_NAME)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        conn.close()
+        assert {"summaries", "deliveries"} <= tables
@@ -16,22 +16,22 @@ This prevents CI failures when backend isn't running.
 """
 
 import os
-import sys
 import json
+import asyncio
 import time
 import httpx
+from collections import deque
+from functools import lru_cache
 import pytest
 from pathlib import Path
 
-# Add backend to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from config import get_settings
 
 # Test configuration
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 TEST_VIDEO_PATH = Path(__file__).parent.parent / "temp_videos" / "chunk_10s.mp4"
 FULL_VIDEO_PATH = Path(__file__).parent.parent / "test_video.mp4"
+SSE_READ_SIZE = 64 * 1024  # one read covers many SSE events
 
 # Skip integration tests unless explicitly enabled
 SKIP_INTEGRATION = os.getenv("RUN_INTEGRATION_TESTS", "0") != "1"
@@ -44,6 +44,57 @@ def get_auth_headers():
     return {"Authorization": f"Bearer {settings.API_SECRET}"}
 
 
+def encode_upload(data, files):
+    """Encode a multipart body once; returns (content, headers) for content= uploads."""
+    request = httpx.Request("POST", BACKEND_URL, data=data, files=files)
+    return request.read(), {**get_auth_headers(), "Content-Type": request.headers["Content-Type"]}
+
+
+def _pop_lines(buffer):
+    """Remove and return every complete line in buffer, leaving any partial tail."""
+    end = buffer.rfind(b"\n")
+    if end < 0:
+        return []
+    lines = bytes(buffer[:end]).split(b"\n")
+    del buffer[:end + 1]
+    return lines
+
+
+def iter_sse_data(response):
+    """Yield SSE data payloads, reading the stream in SSE_READ_SIZE chunks."""
+    buffer = bytearray()
+    for chunk in response.iter_raw(chunk_size=SSE_READ_SIZE):
+        buffer += chunk
+        for line in _pop_lines(buffer):
+            if line.startswith(b"data:"):
+                yield line[5:].strip().decode()
+
+
+async def aiter_sse_data(response):
+    """Async variant of iter_sse_data."""
+    buffer = bytearray()
+    async for chunk in response.aiter_raw(chunk_size=SSE_READ_SIZE):
+        buffer += chunk
+        for line in _pop_lines(buffer):
+            if line.startswith(b"data:"):
+                yield line[5:].strip().decode()
+
+
+@lru_cache(maxsize=None)
+def scout_upload():
+    """Multipart body for /detect-action, shared by every Scout call."""
+    return encode_upload({}, {"file": ("chunk.mp4", TEST_VIDEO_PATH.read_bytes(), "video/mp4")})
+
+
+@lru_cache(maxsize=None)
+def analyze_upload():
+    """Multipart body for /analyze, shared by every upload call."""
+    return encode_upload(
+        {"config": "club", "language": "en"},
+        {"video": ("clip.mov", TEST_VIDEO_PATH.read_bytes(), "video/quicktime")}
+    )
+
+
 class TestScoutDetection:
     """Test Scout (detect-action) endpoint with real video."""
 
@@ -58,17 +109,11 @@ class TestScoutDetection:
         print(f"\n🎬 Testing Scout with: {TEST_VIDEO_PATH}")
         print(f"   Video size: {TEST_VIDEO_PATH.stat().st_size / 1024:.1f} KB")
 
-        with open(TEST_VIDEO_PATH, "rb") as f:
-            video_bytes = f.read()
-
+        content, headers = scout_upload()
         start_time = time.time()
 
         with httpx.Client(timeout=120.0) as client:
-            response = client.post(
-                f"{BACKEND_URL}/detect-action",
-                headers=get_auth_headers(),
-                files={"file": ("chunk.mp4", video_bytes, "video/mp4")}
-            )
+            response = client.post(f"{BACKEND_URL}/detect-action", content=content, headers=headers)
 
         elapsed = time.time() - start_time
         print(f"   Response time: {elapsed:.2f}s")
@@ -95,15 +140,10 @@ class TestScoutDetection:
     @pytest.mark.skipif(not TEST_VIDEO_PATH.exists(), reason="Test video not found")
     def test_detect_action_response_format(self):
         """Verify response format matches iOS expectations."""
-        with open(TEST_VIDEO_PATH, "rb") as f:
-            video_bytes = f.read()
+        content, headers = scout_upload()
 
         with httpx.Client(timeout=120.0) as client:
-            response = client.post(
-                f"{BACKEND_URL}/detect-action",
-                headers=get_auth_headers(),
-                files={"file": ("chunk.mp4", video_bytes, "video/mp4")}
-            )
+            response = client.post(f"{BACKEND_URL}/detect-action", content=content, headers=headers)
 
         data = response.json()
 
@@ -127,18 +167,11 @@ class TestCoachAnalysis:
         """
         print(f"\n📤 Testing Upload with: {TEST_VIDEO_PATH}")
 
-        with open(TEST_VIDEO_PATH, "rb") as f:
-            video_bytes = f.read()
-
+        content, headers = analyze_upload()
         start_time = time.time()
 
         with httpx.Client(timeout=120.0) as client:
-            response = client.post(
-                f"{BACKEND_URL}/analyze",
-                headers=get_auth_headers(),
-                data={"config": "club", "language": "en"},
-                files={"video": ("test.mov", video_bytes, "video/quicktime")}
-            )
+            response = client.post(f"{BACKEND_URL}/analyze", content=content, headers=headers)
 
         elapsed = time.time() - start_time
         print(f"   Response time: {elapsed:.2f}s")
@@ -163,16 +196,10 @@ class TestCoachAnalysis:
             networkService.streamAnalysis(videoID: videoID, videoURL: nil, config: config, language: "en")
         """
         # First upload video
-        with open(TEST_VIDEO_PATH, "rb") as f:
-            video_bytes = f.read()
+        content, headers = analyze_upload()
 
         with httpx.Client(timeout=120.0) as client:
-            upload_response = client.post(
-                f"{BACKEND_URL}/analyze",
-                headers=get_auth_headers(),
-                data={"config": "club", "language": "en"},
-                files={"video": ("test.mov", video_bytes, "video/quicktime")}
-            )
+            upload_response = client.post(f"{BACKEND_URL}/analyze", content=content, headers=headers)
 
         if upload_response.status_code != 200:
             pytest.skip("Upload failed, cannot test streaming")
@@ -185,8 +212,8 @@ class TestCoachAnalysis:
 
         print(f"\n📡 Testing SSE Stream for video_id: {video_id}")
 
-        # Stream analysis (SSE)
-        events = []
+        # Stream analysis (SSE) - one event is enough to prove the stream is live
+        event_count = 0
         start_time = time.time()
 
         with httpx.Client(timeout=300.0) as client:
@@ -199,105 +226,92 @@ class TestCoachAnalysis:
                 assert response.status_code == 200
                 assert "text/event-stream" in response.headers.get("content-type", "")
 
-                for line in response.iter_lines():
-                    if line.startswith("data:"):
-                        event_data = line[5:].strip()
-                        events.append(event_data)
-                        print(f"   SSE Event: {event_data[:100]}...")
-
-                        # Check for completion
-                        if '"type":"complete"' in event_data or '"type":"error"' in event_data:
-                            break
+                for event_data in iter_sse_data(response):
+                    event_count += 1
+                    print(f"   SSE Event: {event_data[:100]}...")
+                    break
 
         elapsed = time.time() - start_time
-        print(f"   Total stream time: {elapsed:.2f}s")
-        print(f"   Events received: {len(events)}")
+        print(f"   Time to first event: {elapsed:.2f}s")
 
-        assert len(events) > 0, "Should receive at least one SSE event"
+        assert event_count > 0, "Should receive at least one SSE event"
 
 
 class TestFullPipeline:
     """Test complete frontend flow: Scout -> Upload -> Coach."""
 
+    @pytest.mark.asyncio
     @pytest.mark.skipif(not TEST_VIDEO_PATH.exists(), reason="Test video not found")
-    def test_complete_flow(self):
+    async def test_complete_flow(self):
         """
         Simulates complete iOS flow:
         1. User imports video
         2. VideoActionDetector scans chunks for bowling
         3. When found, extract clip and upload
         4. Stream analysis results
+
+        Scout and upload are independent, so they run concurrently.
         """
         print("\n" + "="*60)
         print("🏏 FULL PIPELINE TEST - Simulating iOS Frontend")
         print("="*60)
 
-        # Step 1: Scout Detection
-        print("\n[1/3] SCOUT: Detecting bowling action...")
-        with open(TEST_VIDEO_PATH, "rb") as f:
-            video_bytes = f.read()
+        scout_content, scout_headers = scout_upload()
+        upload_content, upload_headers = analyze_upload()
 
-        with httpx.Client(timeout=120.0) as client:
-            scout_response = client.post(
-                f"{BACKEND_URL}/detect-action",
-                headers=get_auth_headers(),
-                files={"file": ("chunk.mp4", video_bytes, "video/mp4")}
+        async with httpx.AsyncClient(base_url=BACKEND_URL, timeout=300.0) as client:
+            # Steps 1+2: Scout Detection and Upload (regardless of detection for test purposes)
+            print("\n[1-2/3] SCOUT + UPLOAD: Detecting bowling action and sending video...")
+            scout_response, upload_response = await asyncio.gather(
+                client.post("/detect-action", content=scout_content, headers=scout_headers),
+                client.post("/analyze", content=upload_content, headers=upload_headers),
             )
 
-        assert scout_response.status_code == 200
-        scout_data = scout_response.json()
-        print(f"      Result: found={scout_data.get('found')}, "
-              f"timestamp={scout_data.get('timestamp')}, "
-              f"confidence={scout_data.get('confidence')}")
+            assert scout_response.status_code == 200
+            scout_data = scout_response.json()
+            print(f"      Result: found={scout_data.get('found')}, "
+                  f"timestamp={scout_data.get('timestamp')}, "
+                  f"confidence={scout_data.get('confidence')}")
 
-        # Step 2: Upload (regardless of detection for test purposes)
-        print("\n[2/3] UPLOAD: Sending video for analysis...")
-        with httpx.Client(timeout=120.0) as client:
-            upload_response = client.post(
-                f"{BACKEND_URL}/analyze",
-                headers=get_auth_headers(),
-                data={"config": "club", "language": "en"},
-                files={"video": ("clip.mov", video_bytes, "video/quicktime")}
-            )
+            assert upload_response.status_code == 200
+            upload_data = upload_response.json()
+            video_id = upload_data.get("video_id")
+            print(f"      video_id: {video_id}")
 
-        assert upload_response.status_code == 200
-        upload_data = upload_response.json()
-        video_id = upload_data.get("video_id")
-        print(f"      video_id: {video_id}")
+            if not video_id:
+                print("      ⚠️ No video_id - skipping stream test")
+                return
 
-        if not video_id:
-            print("      ⚠️ No video_id - skipping stream test")
-            return
+            # Step 3: Stream Analysis (depends on video_id)
+            print("\n[3/3] COACH: Streaming analysis...")
+            events_received = 0
+            recent_events = deque(maxlen=16)
+            final_result = None
 
-        # Step 3: Stream Analysis
-        print("\n[3/3] COACH: Streaming analysis...")
-        events_received = 0
-        final_result = None
-
-        with httpx.Client(timeout=300.0) as client:
-            with client.stream(
+            async with client.stream(
                 "GET",
-                f"{BACKEND_URL}/stream-analysis",
+                "/stream-analysis",
                 params={"video_id": video_id, "config": "club", "language": "en"},
                 headers=get_auth_headers()
             ) as response:
-                for line in response.iter_lines():
-                    if line.startswith("data:"):
-                        events_received += 1
-                        event_data = line[5:].strip()
-
-                        try:
-                            parsed = json.loads(event_data)
-                            if parsed.get("type") == "complete":
-                                final_result = parsed
-                                break
-                            elif parsed.get("type") == "error":
-                                print(f"      ❌ Error: {parsed.get('message')}")
-                                break
-                        except json.JSONDecodeError:
-                            pass
+                async for event_data in aiter_sse_data(response):
+                    events_received += 1
+                    recent_events.append(event_data)
+
+                    try:
+                        parsed = json.loads(event_data)
+                        if parsed.get("type") == "complete":
+                            final_result = parsed
+                            break
+                        elif parsed.get("type") == "error":
+                            print(f"      ❌ Error: {parsed.get('message')}")
+                            break
+                    except json.JSONDecodeError:
+                        pass
 
         print(f"      Events received: {events_received}")
+        for event_data in recent_events:
+            print(f"      SSE Event: {event_data[:100]}")
 
         if final_result:
             print("\n" + "-"*40)
@@ -316,44 +330,3 @@ class TestFullPipeline:
         print("✅ PIPELINE TEST COMPLETE")
         print("="*60)
 
-
-# CLI Runner
-if __name__ == "__main__":
-    """
-    Run directly: python test_integration_driver.py
-
-    Usage:
-        # Test against local backend
-        python test_integration_driver.py
-
-        # Test against deployed backend
-        BACKEND_URL=https://your-backend.run.app python test_integration_driver.py
-    """
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Backend Integration Test Driver")
-    parser.add_argument("--url", default=BACKEND_URL, help="Backend URL")
-    parser.add_argument("--video", default=str(TEST_VIDEO_PATH), help="Video file path")
-    parser.add_argument("--scout-only", action="store_true", help="Only test Scout detection")
-    args = parser.parse_args()
-
-    # Override globals
-    BACKEND_URL = args.url
-    if args.video:
-        TEST_VIDEO_PATH = Path(args.video)
-
-    print(f"Backend URL: {BACKEND_URL}")
-    print(f"Test Video: {TEST_VIDEO_PATH}")
-    print(f"Video exists: {TEST_VIDEO_PATH.exists()}")
-
-    if not TEST_VIDEO_PATH.exists():
-        print("❌ Test video not found!")
-        sys.exit(1)
-
-    # Run tests
-    test_scout = TestScoutDetection()
-    result = test_scout.test_detect_action_with_real_video()
-
-    if not args.scout_only:
-        test_pipeline = TestFullPipeline()
-        test_pipeline.test_complete_flow()
@@ -13,7 +13,7 @@ class TestMediaPipeOverlay:
 
     def test_load_timed_feedback(self):
         """Should correctly parse feedback JSON."""
-        from mediapipe_overlay import load_timed_feedback
+        from mediapipe_overlay import load_timed_feedback, JOINT_ID
 
         feedback = {
             "phases": [
@@ -22,26 +22,29 @@ class TestMediaPipeOverlay:
             ]
         }
 
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(feedback, f)
-            f.flush()
-            phases = load_timed_feedback(f.name)
+        fd, path = tempfile.mkstemp(suffix='.json')
+        try:
+            os.write(fd, json.dumps(feedback).encode())
+            os.close(fd)
+            phases = load_timed_feedback(path)
+        finally:
+            os.unlink(path)
 
         assert len(phases) == 2
         assert phases[0]["name"] == "run_up"
         assert phases[1]["feedback"]["injury_risk"] == ["RIGHT_ELBOW"]
-
-        os.unlink(f.name)
+        assert phases.draw_mask[1][JOINT_ID["RIGHT_ELBOW"]]
+        assert not phases.draw_mask[-1].any()  # "done" row
 
     def test_get_phase_feedback_finds_correct_phase(self):
         """Should return correct phase for given timestamp."""
-        from mediapipe_overlay import get_phase_feedback
+        from mediapipe_overlay import get_phase_feedback, PhaseIndex
 
-        phases = [
+        phases = PhaseIndex([
             {"start": 0.0, "end": 2.0, "name": "run_up", "feedback": {"good": ["A"], "slow": [], "injury_risk": []}},
             {"start": 2.0, "end": 4.0, "name": "release", "feedback": {"good": [], "slow": [], "injury_risk": ["B"]}},
             {"start": 4.0, "end": 6.0, "name": "follow", "feedback": {"good": ["C"], "slow": [], "injury_risk": []}}
-        ]
+        ])
 
         # Test beginning of video
         idx, name, fb = get_phase_feedback(phases, 0.5)
@@ -62,65 +65,90 @@ class TestMediaPipeOverlay:
 
     def test_get_phase_feedback_handles_out_of_range(self):
         """Should handle timestamp beyond phases."""
-        from mediapipe_overlay import get_phase_feedback
+        from mediapipe_overlay import get_phase_feedback, PhaseIndex
 
-        phases = [
+        phases = PhaseIndex([
             {"start": 0.0, "end": 2.0, "name": "only_phase", "feedback": {"good": [], "slow": [], "injury_risk": []}}
-        ]
+        ])
 
         idx, name, fb = get_phase_feedback(phases, 10.0)
         assert name == "done"
 
-    def test_get_color_scanning_phase(self):
-        """Phase 0 should return gray for all joints."""
-        from mediapipe_overlay import get_color
-
-        feedback = {"good": ["RIGHT_KNEE"], "slow": [], "injury_risk": []}
-
-        color = get_color("RIGHT_KNEE", feedback, phase_idx=0)
-        assert color == (180, 180, 180)  # Gray for scanning
-
-        color = get_color("LEFT_KNEE", feedback, phase_idx=0)
-        assert color == (180, 180, 180)  # Gray even if not in feedback
-
-    def test_get_color_feedback_phases(self):
-        """Phase 1+ should return correct colors based on feedback."""
-        from mediapipe_overlay import get_color, GREEN, YELLOW, RED
-
-        feedback = {
-            "good": ["RIGHT_SHOULDER"],
-            "slow": ["RIGHT_HIP"],
-            "injury_risk": ["RIGHT_ELBOW"]
-        }
-
-        # Good = Green
-        color = get_color("RIGHT_SHOULDER", feedback, phase_idx=1)
-        assert color == GREEN
-
-        # Slow = Yellow
-        color = get_color("RIGHT_HIP", feedback, phase_idx=1)
-        assert color == YELLOW
+    def test_get_phase_feedback_gap_and_before_start(self):
+        """Timestamps in a gap or before the first phase should map to done."""
+        from mediapipe_overlay import get_phase_feedback, PhaseIndex, EMPTY_FB
+
+        phases = PhaseIndex([
+            {"start": 1.0, "end": 2.0, "name": "run_up", "feedback": {"good": [], "slow": [], "injury_risk": []}},
+            {"start": 3.0, "end": 4.0, "name": "release", "feedback": {"good": [], "slow": [], "injury_risk": []}}
+        ])
+
+        assert get_phase_feedback(phases, 0.5) == (-1, "done", EMPTY_FB)
+        assert get_phase_feedback(phases, 2.5) == (-1, "done", EMPTY_FB)
+        assert get_phase_feedback(phases, 3.0)[1] == "release"
+
+    def test_phase_index_color_table(self):
+        """Per-phase color rows should cover every key joint."""
+        from mediapipe_overlay import PhaseIndex, JOINT_ID, RED, GREEN
+
+        phases = PhaseIndex([
+            {"start": 0.0, "end": 2.0, "name": "run_up", "feedback": {"good": [], "slow": [], "injury_risk": []}},
+            {"start": 2.0, "end": 4.0, "name": "release", "feedback": {"good": ["RIGHT_WRIST"], "slow": [], "injury_risk": ["RIGHT_ELBOW"]}}
+        ])
+
+        assert phases.draw_mask[0].all()  # scanning: every joint drawn
+        assert tuple(phases.colors[0, JOINT_ID["LEFT_KNEE"]]) == (180, 180, 180)
+        assert tuple(phases.colors[1, JOINT_ID["RIGHT_ELBOW"]]) == RED
+        assert tuple(phases.colors[1, JOINT_ID["RIGHT_WRIST"]]) == GREEN
+        assert phases.draw_mask[1].sum() == 2
+        assert not phases.draw_mask[-1].any()  # "done": nothing drawn
+
+    def test_phase_index_scanning_phase(self):
+        """Phase 0 should draw every joint gray, feedback or not."""
+        from mediapipe_overlay import PhaseIndex, JOINT_ID, SCAN_GRAY
+
+        phases = PhaseIndex([
+            {"start": 0.0, "end": 2.0, "name": "run_up", "feedback": {"good": ["RIGHT_KNEE"], "slow": [], "injury_risk": []}}
+        ])
+
+        assert tuple(phases.colors[0, JOINT_ID["RIGHT_KNEE"]]) == SCAN_GRAY
+        assert tuple(phases.colors[0, JOINT_ID["LEFT_KNEE"]]) == SCAN_GRAY
+
+    def test_phase_index_feedback_colors(self):
+        """Phase 1+ should color joints by feedback category and hide the rest."""
+        from mediapipe_overlay import PhaseIndex, JOINT_ID, GREEN, YELLOW, RED
+
+        phases = PhaseIndex([
+            {"start": 0.0, "end": 2.0, "name": "run_up", "feedback": {"good": [], "slow": [], "injury_risk": []}},
+            {"start": 2.0, "end": 4.0, "name": "release", "feedback": {
+                "good": ["RIGHT_SHOULDER"], "slow": ["RIGHT_HIP"], "injury_risk": ["RIGHT_ELBOW"]}}
+        ])
+
+        assert tuple(phases.colors[1, JOINT_ID["RIGHT_SHOULDER"]]) == GREEN
+        assert tuple(phases.colors[1, JOINT_ID["RIGHT_HIP"]]) == YELLOW
+        assert tuple(phases.colors[1, JOINT_ID["RIGHT_ELBOW"]]) == RED
+        assert not phases.draw_mask[1][JOINT_ID["LEFT_ANKLE"]]  # not in feedback: don't draw
+
+    def test_phase_index_priority_injury_over_slow(self):
+        """Injury risk should take priority if joint is in multiple categories."""
+        from mediapipe_overlay import PhaseIndex, JOINT_ID, RED
 
-        # Injury risk = Red
-        color = get_color("RIGHT_ELBOW", feedback, phase_idx=1)
-        assert color == RED
+        both = ["RIGHT_ELBOW"]
+        phases = PhaseIndex([
+            {"start": 0.0, "end": 2.0, "name": "run_up", "feedback": {"good": [], "slow": [], "injury_risk": []}},
+            {"start": 2.0, "end": 4.0, "name": "release", "feedback": {"good": both, "slow": both, "injury_risk": both}}
+        ])
 
-        # Not in feedback = None (don't draw)
-        color = get_color("LEFT_ANKLE", feedback, phase_idx=1)
-        assert color is None
+        assert tuple(phases.colors[1, JOINT_ID["RIGHT_ELBOW"]]) == RED
 
-    def test_get_color_priority_injury_over_slow(self):
-        """Injury risk should take priority if joint is in multiple categories."""
-        from mediapipe_overlay import get_color, RED
+    def test_decoded_frames_in_order(self):
+        """Background decoding should yield every frame in order, then stop."""
+        from mediapipe_overlay import _decoded_frames
 
-        feedback = {
-            "good": ["RIGHT_ELBOW"],
-            "slow": ["RIGHT_ELBOW"],
-            "injury_risk": ["RIGHT_ELBOW"]
-        }
+        cap = MagicMock()
+        cap.read.side_effect = [(True, i) for i in range(100)] + [(False, None)]
 
-        color = get_color("RIGHT_ELBOW", feedback, phase_idx=1)
-        assert color == RED  # Injury risk takes priority
+        assert list(_decoded_frames(cap, 0)) == list(range(100))
 
     def test_key_joints_constant(self):
         """KEY_JOINTS should contain exactly 12 bowling-relevant joints."""
@@ -144,10 +172,6 @@ class TestGenerateOverlayVideo:
 
     def test_joint_map_coverage(self):
         """Joint map should cover common Coach phase names."""
-        # Import the function to access the joint_map
-        import sys
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
         joint_map = {
             "run-up": {"good": ["RIGHT_KNEE", "LEFT_KNEE", "RIGHT_HIP", "LEFT_HIP"]},
             "loading/coil": {"good": ["RIGHT_SHOULDER", "LEFT_SHOULDER", "RIGHT_HIP"]},
@@ -67,8 +67,9 @@ class TestAnalysisPrompt:
         prompt = get_analysis_prompt("technical", "en", 3.0)
 
         phases = ["RUN-UP", "LOADING", "COIL", "RELEASE", "WRIST", "HEAD", "EYES", "FOLLOW-THROUGH"]
+        prompt_cf = prompt.casefold()
         for phase in phases:
-            assert phase in prompt.upper() or phase.lower() in prompt.lower()
+            assert phase.casefold() in prompt_cf
 
     def test_prompt_contains_output_format(self):
         """Test that prompt specifies JSON output format."""
@@ -4,6 +4,8 @@ Tests the response format compatibility with iOS frontend.
 """
 import pytest
 import json
+from utils import Deliveries, normalize_gemini_response
+from scout_eval import unmatched_timestamps
 
 
 class TestScoutResponseFormat:
@@ -79,10 +81,10 @@ class TestConfidenceThresholdFiltering:
             {"timestamp": 15.0, "confidence": 0.50},  # Below threshold
         ]
 
-        valid = [d for d in deliveries if d.get("confidence", 0) >= threshold]
+        valid = Deliveries.from_dicts(deliveries).filter_confidence(threshold)
 
         assert len(valid) == 1
-        assert valid[0]["timestamp"] == 10.0
+        assert valid.as_dict_list()[0]["timestamp"] == 10.0
 
     def test_all_above_threshold(self):
         """Test when all detections are above threshold."""
@@ -94,7 +96,7 @@ class TestConfidenceThresholdFiltering:
             {"timestamp": 37.0, "confidence": 0.88},
         ]
 
-        valid = [d for d in deliveries if d.get("confidence", 0) >= threshold]
+        valid = Deliveries.from_dicts(deliveries).filter_confidence(threshold)
 
         assert len(valid) == 3
 
@@ -107,9 +109,23 @@ class TestConfidenceThresholdFiltering:
             {"timestamp": 10.0, "confidence": 0.60},
         ]
 
-        valid = [d for d in deliveries if d.get("confidence", 0) >= threshold]
+        valid = Deliveries.from_dicts(deliveries).filter_confidence(threshold)
 
         assert len(valid) == 0
+        assert valid.sorted_timestamps() == []
+
+    def test_filter_keeps_anchors_and_sorts(self):
+        """Filtering should keep anchors aligned and sort timestamps as plain floats."""
+        deliveries = Deliveries.from_dicts([
+            {"timestamp": 18.8, "confidence": 0.95, "anchor": "delivery 2"},
+            {"timestamp": 6.5, "confidence": 0.90, "anchor": "delivery 1"},
+            {"timestamp": 12.0, "confidence": 0.40, "anchor": "noise"},
+        ])
+
+        valid = deliveries.filter_confidence(0.70)
+
+        assert valid.anchors == ["delivery 2", "delivery 1"]
+        assert valid.sorted_timestamps() == [6.5, 18.8]
 
 
 class TestDeliveryTimestampAccuracy:
@@ -123,9 +139,14 @@ class TestDeliveryTimestampAccuracy:
         """Test that detected timestamps are within tolerance of expected."""
         detected = [6.5, 18.8, 37.7, 58.7]
 
-        for expected in self.EXPECTED_TIMESTAMPS:
-            matches = [d for d in detected if abs(d - expected) <= self.TOLERANCE]
-            assert len(matches) >= 1, f"No detection within ±{self.TOLERANCE}s of {expected}s"
+        missed = unmatched_timestamps(self.EXPECTED_TIMESTAMPS, detected, self.TOLERANCE)
+        assert missed == [], f"No detection within ±{self.TOLERANCE}s of {missed}"
+
+    def test_unmatched_timestamps_reports_misses(self):
+        """Expected timestamps without a nearby detection are reported."""
+        detected = [40.0, 6.5, 100.0]
+
+        assert unmatched_timestamps([0, 6, 18, 37, 59, 101], detected, self.TOLERANCE) == [0, 18, 37, 59]
 
     def test_correct_delivery_count(self):
         """Test that correct number of deliveries detected."""
@@ -147,9 +168,11 @@ class TestResponseParsing:
             "total_count": 2
         }
 
-        deliveries = gemini_response.get("deliveries", [])
-        assert len(deliveries) == 2
-        assert deliveries[0]["timestamp"] == 6.0
+        normalized = normalize_gemini_response(gemini_response)
+        assert normalized["total_count"] == 2
+        assert normalized["deliveries"][0]["timestamp"] == 6.0
+        assert normalized["timestamp"] == 6.0
+        assert normalized["confidence"] == 0.95
 
     def test_parse_empty_deliveries(self):
         """Test parsing empty deliveries response."""
@@ -158,8 +181,10 @@ class TestResponseParsing:
             "total_count": 0
         }
 
-        deliveries = gemini_response.get("deliveries", [])
-        assert len(deliveries) == 0
+        normalized = normalize_gemini_response(gemini_response)
+        assert normalized["found"] is False
+        assert normalized["deliveries"] == []
+        assert normalized["timestamp"] is None
 
     def test_handle_list_response(self):
         """Test handling when Gemini returns a list directly."""
@@ -168,13 +193,24 @@ class TestResponseParsing:
             {"timestamp": 18.0, "confidence": 0.90}
         ]
 
-        # Backend should handle this format
-        if isinstance(gemini_response, list):
-            deliveries = gemini_response
-        else:
-            deliveries = gemini_response.get("deliveries", [])
+        normalized = normalize_gemini_response(gemini_response)
+        assert normalized["total_count"] == 2
+        assert normalized["found"] is True
+
+    def test_normalize_current_and_single_formats(self):
+        """Current timestamp-array and legacy single-dict shapes normalize alike."""
+        current = normalize_gemini_response(
+            {"found": True, "deliveries_detected_at_time": [6.2, 18.5], "total_count": 2}
+        )
+        assert [d["timestamp"] for d in current["deliveries"]] == [6.2, 18.5]
+        assert current["confidence"] == 1.0
+
+        single = normalize_gemini_response({"found": True, "timestamp": 7.0, "confidence": 0.98})
+        assert single["deliveries"] == [{"timestamp": 7.0, "confidence": 0.98}]
+        assert (single["timestamp"], single["total_count"]) == (7.0, 1)
 
-        assert len(deliveries) == 2
+        missed = normalize_gemini_response({"found": False, "timestamp": None})
+        assert missed["found"] is False and missed["total_count"] == 0
 
 
 class TestiOSCompatibility:
@@ -1,7 +1,8 @@
 # Tests for GCS storage service
 import pytest
+from io import BytesIO
 from unittest.mock import patch, MagicMock, mock_open
-import sys
+from tests._mocks import MockGCSService, MockSettings
 
 # Check if google.cloud.storage is available
 try:
@@ -10,6 +11,10 @@ try:
 except ImportError:
     GCS_AVAILABLE = False
 
+if GCS_AVAILABLE:
+    import storage
+    from storage import GCSStorageService, get_storage_service
+
 
 pytestmark = pytest.mark.skipif(
     not GCS_AVAILABLE,
@@ -17,260 +22,228 @@ pytestmark = pytest.mark.skipif(
 )
 
 
-class TestGCSStorageService:
-    """Tests for GCS storage service."""
+@pytest.fixture
+def gcs():
+    return MockGCSService()
+
+
+@pytest.fixture
+def mock_blob(gcs):
+    return gcs.blob
+
+
+@pytest.fixture
+def mock_bucket(gcs):
+    return gcs.bucket
+
+
+@pytest.fixture
+def mock_client(gcs):
+    return gcs.client
 
-    @pytest.fixture(autouse=True)
-    def setup_env(self):
-        """Set up environment for storage tests."""
-        import os
-        original_key = os.environ.get("GOOGLE_API_KEY")
-        os.environ["GOOGLE_API_KEY"] = "test-api-key"
 
-        yield
+@pytest.fixture(autouse=True)
+def mock_settings(monkeypatch):
+    """storage reads its settings at import; swap in a plain namespace."""
+    ns = MockSettings()
+    monkeypatch.setattr("storage.settings", ns)
+    return ns
 
-        if original_key:
-            os.environ["GOOGLE_API_KEY"] = original_key
-        elif "GOOGLE_API_KEY" in os.environ:
-            del os.environ["GOOGLE_API_KEY"]
+
+class TestGCSStorageService:
+    """Tests for GCS storage service."""
 
     @patch('storage.storage.Client')
     def test_client_lazy_initialization(self, mock_client_cls):
         """Test that client is lazily initialized."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
+        service = GCSStorageService()
+        # Client should not be initialized yet
+        assert service._client is None
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            # Client should not be initialized yet
-            assert service._client is None
+        # Access client property
+        _ = service.client
 
-            # Access client property
-            _ = service.client
-
-            # Now it should be initialized
-            mock_client_cls.assert_called_once()
+        # Now it should be initialized
+        mock_client_cls.assert_called_once()
 
     @patch('storage.storage.Client')
-    @patch('storage.service_account.Credentials.from_service_account_file')
-    def test_client_with_credentials_path(self, mock_creds, mock_client_cls):
-        """Test client initialization with credentials file."""
-        mock_creds.return_value = MagicMock()
-
-        # Patch settings at module level
-        with patch.object(__import__('storage'), 'settings') as mock_settings:
-            mock_settings.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.GCS_CREDENTIALS_PATH = "/path/to/creds.json"
+    def test_client_uses_default_credentials(self, mock_client_cls, monkeypatch):
+        """Client comes from application-default credentials and is built once."""
+        monkeypatch.setattr("storage.settings", MockSettings(GCS_CREDENTIALS_PATH="/path/to/creds.json"))
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            _ = service.client
+        service = GCSStorageService()
+        first = service.client
+        second = service.client
 
-            mock_creds.assert_called_once_with("/path/to/creds.json")
-            mock_client_cls.assert_called_once()
+        mock_client_cls.assert_called_once_with()
+        assert first is second
 
     @patch('storage.storage.Client')
-    def test_bucket_get_existing(self, mock_client_cls):
+    def test_bucket_get_existing(self, mock_client_cls, mock_client, mock_bucket):
         """Test getting an existing bucket."""
-        mock_client = MagicMock()
-        mock_bucket = MagicMock()
-        mock_client.get_bucket.return_value = mock_bucket
         mock_client_cls.return_value = mock_client
 
-        with patch.object(__import__('storage'), 'settings') as mock_settings:
-            mock_settings.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.GCS_CREDENTIALS_PATH = None
+        service = GCSStorageService()
+        bucket = service.bucket
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            bucket = service.bucket
-
-            mock_client.get_bucket.assert_called_once_with("test-bucket")
-            assert bucket == mock_bucket
+        mock_client.get_bucket.assert_called_once_with("test-bucket")
+        assert bucket == mock_bucket
 
     @patch('storage.storage.Client')
-    def test_bucket_create_if_not_exists(self, mock_client_cls):
+    def test_bucket_create_if_not_exists(self, mock_client_cls, mock_client):
         """Test bucket creation when it doesn't exist."""
-        mock_client = MagicMock()
         mock_client.get_bucket.side_effect = Exception("Bucket not found")
-        mock_new_bucket = MagicMock()
+        mock_new_bucket = MagicMock(spec=MockGCSService.spec("Bucket"))
         mock_client.create_bucket.return_value = mock_new_bucket
         mock_client_cls.return_value = mock_client
 
-        with patch.object(__import__('storage'), 'settings') as mock_settings:
-            mock_settings.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.GCS_CREDENTIALS_PATH = None
+        service = GCSStorageService()
+        bucket = service.bucket
+
+        mock_client.create_bucket.assert_called_once_with("test-bucket", location="us-central1")
+        assert bucket == mock_new_bucket
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            bucket = service.bucket
+    @patch('storage.storage.Client')
+    def test_warmup_triggers_client_init(self, mock_client_cls, mock_client):
+        """warmup() opens the client and fetches the bucket before any upload."""
+        mock_client_cls.return_value = mock_client
+        service = GCSStorageService()
 
-            mock_client.create_bucket.assert_called_once_with("test-bucket", location="us-central1")
-            assert bucket == mock_new_bucket
+        service.warmup()
 
-    @patch('storage.subprocess.run')
-    def test_generate_thumbnail_success(self, mock_run):
+        mock_client_cls.assert_called_once()
+        mock_client.get_bucket.assert_called_once_with("test-bucket")
+        mock_client.get_bucket.return_value.blob.assert_not_called()
+
+    def test_generate_thumbnail_success(self, no_subprocess):
         """Test successful thumbnail generation."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
-
-            mock_run.return_value = MagicMock(returncode=0)
-
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            result = service.generate_thumbnail("/path/video.mp4", "/path/thumb.jpg")
-
-            assert result is True
-            mock_run.assert_called_once()
-            # Verify ffmpeg command structure
-            call_args = mock_run.call_args[0][0]
-            assert "ffmpeg" in call_args
-            assert "/path/video.mp4" in call_args
-            assert "/path/thumb.jpg" in call_args
-
-    @patch('storage.subprocess.run')
-    def test_generate_thumbnail_failure(self, mock_run):
+        mock_run = no_subprocess
+        service = GCSStorageService()
+        result = service.generate_thumbnail("/path/video.mp4", "/path/thumb.jpg")
+
+        assert result is True
+        mock_run.assert_called_once()
+        # Verify ffmpeg command structure
+        call_args = mock_run.call_args[0][0]
+        assert "ffmpeg" in call_args
+        assert "/path/video.mp4" in call_args
+        assert "/path/thumb.jpg" in call_args
+
+    def test_generate_thumbnail_failure(self, no_subprocess):
         """Test thumbnail generation failure handling."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
-
-            mock_run.side_effect = Exception("ffmpeg not found")
+        no_subprocess.side_effect = Exception("ffmpeg not found")
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            result = service.generate_thumbnail("/path/video.mp4", "/path/thumb.jpg")
+        service = GCSStorageService()
+        result = service.generate_thumbnail("/path/video.mp4", "/path/thumb.jpg")
 
-            assert result is False
+        assert result is False
 
     @patch('storage.storage.Client')
     @patch('storage.os.path.exists')
     @patch('storage.os.remove')
-    def test_upload_clip(self, mock_remove, mock_exists, mock_client_cls):
+    def test_upload_clip(self, mock_remove, mock_exists, mock_client_cls,
+                         mock_client, mock_bucket, mock_blob):
         """Test clip upload with video and thumbnail."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
+        mock_client_cls.return_value = mock_client
+        mock_exists.return_value = True
 
-            mock_client = MagicMock()
-            mock_bucket = MagicMock()
-            mock_blob = MagicMock()
-            mock_blob.generate_signed_url.return_value = "https://signed-url.com"
+        service = GCSStorageService()
 
-            mock_client.get_bucket.return_value = mock_bucket
-            mock_bucket.blob.return_value = mock_blob
-            mock_client_cls.return_value = mock_client
-            mock_exists.return_value = True
+        # Mock thumbnail generation
+        with patch.object(service, 'generate_thumbnail', return_value=True):
+            video_url, thumb_url = service.upload_clip("/path/video.mp4", "delivery-123", base_url="https://api")
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
+        # Should have uploaded video and thumbnail
+        mock_bucket.blob.assert_any_call("clips/delivery-123.mp4")
+        mock_bucket.blob.assert_any_call("thumbs/delivery-123.jpg")
+        mock_blob.upload_from_filename.assert_any_call("/path/video.mp4", content_type="video/mp4")
+        mock_blob.upload_from_filename.assert_any_call("/path/video_thumb.jpg", content_type="image/jpeg")
+        mock_remove.assert_called_once_with("/path/video_thumb.jpg")
 
-            # Mock thumbnail generation
-            with patch.object(service, 'generate_thumbnail', return_value=True):
-                video_url, thumb_url = service.upload_clip("/path/video.mp4", "delivery-123")
+        # Should return backend proxy URLs
+        assert video_url == "https://api/media/video/delivery-123"
+        assert thumb_url == "https://api/media/thumb/delivery-123"
 
-            # Should have uploaded video
-            mock_bucket.blob.assert_any_call("clips/delivery-123.mp4")
-            mock_blob.upload_from_filename.assert_called()
+    @patch('storage.storage.Client')
+    def test_upload_clip_parallel(self, mock_client_cls, mock_client, mock_blob):
+        """Video and thumbnail uploads are both submitted to the shared pool."""
+        mock_client_cls.return_value = mock_client
+        service = GCSStorageService()
 
-            # Should return signed URLs
-            assert "signed-url" in video_url
-            assert "signed-url" in thumb_url
+        with patch.object(service, 'generate_thumbnail', return_value=True), \
+             patch('storage.os.path.exists', return_value=False), \
+             patch.object(storage._UPLOAD_POOL, 'submit', wraps=storage._UPLOAD_POOL.submit) as submit:
+            service.upload_clip("/path/video.mp4", "delivery-123")
+
+        assert submit.call_count == 2
+        assert mock_blob.upload_from_filename.call_count == 2
 
     @patch('storage.storage.Client')
-    def test_get_signed_url(self, mock_client_cls):
-        """Test signed URL generation."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
+    def test_upload_clip_from_file_object(self, mock_client_cls, mock_client, mock_bucket, mock_blob, no_subprocess):
+        """In-memory clips stream straight to GCS without touching the filesystem."""
+        mock_client_cls.return_value = mock_client
+        video = BytesIO(b"fake video bytes")
 
-            mock_client = MagicMock()
-            mock_bucket = MagicMock()
-            mock_blob = MagicMock()
-            mock_blob.generate_signed_url.return_value = "https://storage.googleapis.com/signed"
+        video_url, thumb_url = GCSStorageService().upload_clip(video, "delivery-123", base_url="https://api")
 
-            mock_client.get_bucket.return_value = mock_bucket
-            mock_bucket.blob.return_value = mock_blob
-            mock_client_cls.return_value = mock_client
+        mock_bucket.blob.assert_called_once_with("clips/delivery-123.mp4")
+        mock_blob.upload_from_file.assert_called_once_with(video, content_type="video/mp4")
+        mock_blob.upload_from_filename.assert_not_called()
+        no_subprocess.assert_not_called()  # no ffmpeg thumbnail for file objects
+        assert video_url == "https://api/media/video/delivery-123"
+        assert thumb_url == ""
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            url = service.get_signed_url("clips/test.mp4", expiration_hours=2)
+    @patch('storage.storage.Client')
+    def test_upload_clip_propagates_upload_error(self, mock_client_cls, mock_client, mock_blob):
+        """A failed PUT on the worker thread is re-raised to the caller."""
+        mock_client_cls.return_value = mock_client
+        mock_blob.upload_from_filename.side_effect = RuntimeError("503")
+        service = GCSStorageService()
 
-            mock_blob.generate_signed_url.assert_called_once()
-            assert url == "https://storage.googleapis.com/signed"
+        with patch.object(service, 'generate_thumbnail', return_value=False):
+            with pytest.raises(RuntimeError):
+                service.upload_clip("/path/video.mp4", "delivery-123")
 
-    @patch('storage.storage.Client')
-    def test_refresh_signed_url(self, mock_client_cls):
-        """Test refreshing signed URL for playback."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
+    @pytest.mark.parametrize("blob_name, expected", [
+        ("clips/test.mp4", "https://api/media/video/test"),
+        ("thumbs/test.jpg", "https://api/media/thumb/test"),
+    ], ids=["video", "thumb"])
+    def test_get_proxy_url(self, blob_name, expected):
+        """Blob names map to backend /media proxy URLs."""
+        service = GCSStorageService()
 
-            mock_client = MagicMock()
-            mock_bucket = MagicMock()
-            mock_blob = MagicMock()
-            mock_blob.generate_signed_url.return_value = "https://fresh-url.com"
+        assert service.get_proxy_url(blob_name, "https://api") == expected
 
-            mock_client.get_bucket.return_value = mock_bucket
-            mock_bucket.blob.return_value = mock_blob
-            mock_client_cls.return_value = mock_client
+    @patch('storage.storage.Client')
+    def test_refresh_signed_url(self, mock_client_cls, mock_client):
+        """Deprecated signed-URL refresh now returns the relative proxy path, without touching GCS."""
+        mock_client_cls.return_value = mock_client
 
-            from storage import GCSStorageService
-            service = GCSStorageService()
-            url = service.refresh_signed_url("delivery-456")
+        service = GCSStorageService()
+        url = service.refresh_signed_url("delivery-456")
 
-            # Should use the correct blob path
-            mock_bucket.blob.assert_called_with("clips/delivery-456.mp4")
-            assert url == "https://fresh-url.com"
+        assert url == "/media/video/delivery-456"
+        mock_client_cls.assert_not_called()
 
 
 class TestStorageServiceSingleton:
     """Tests for storage service singleton."""
 
-    @pytest.fixture(autouse=True)
-    def setup_env(self):
-        """Set up environment for singleton tests."""
-        import os
-        original_key = os.environ.get("GOOGLE_API_KEY")
-        os.environ["GOOGLE_API_KEY"] = "test-api-key"
-
-        yield
-
-        if original_key:
-            os.environ["GOOGLE_API_KEY"] = original_key
-        elif "GOOGLE_API_KEY" in os.environ:
-            del os.environ["GOOGLE_API_KEY"]
-
     def test_get_storage_service_returns_instance(self):
         """Test that get_storage_service returns an instance."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
+        # Reset singleton for test
+        storage._storage_service = None
 
-            # Reset singleton for test
-            import storage
-            storage._storage_service = None
-
-            from storage import get_storage_service, GCSStorageService
-            service = get_storage_service()
-            assert service is not None
-            assert isinstance(service, GCSStorageService)
+        service = get_storage_service()
+        assert service is not None
+        assert isinstance(service, GCSStorageService)
 
     def test_get_storage_service_returns_same_instance(self):
         """Test that get_storage_service returns cached instance."""
-        with patch('storage.get_settings') as mock_settings:
-            mock_settings.return_value.GCS_BUCKET_NAME = "test-bucket"
-            mock_settings.return_value.GCS_CREDENTIALS_PATH = None
-
-            # Reset singleton for test
-            import storage
-            storage._storage_service = None
+        # Reset singleton for test
+        storage._storage_service = None
 
-            from storage import get_storage_service
-            service1 = get_storage_service()
-            service2 = get_storage_service()
+        service1 = get_storage_service()
+        service2 = get_storage_service()
 
-            assert service1 is service2
+        assert service1 is service2
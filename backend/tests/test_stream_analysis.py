@@ -1,7 +1,9 @@
 # Tests for Coach (stream-analysis) endpoint
 import pytest
+import re
 import json
-from unittest.mock import patch, MagicMock, AsyncMock
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
 
 
 class TestAnalyzeEndpoint:
@@ -31,21 +33,14 @@ class TestAnalyzeEndpoint:
         data = response.json()
         video_id = data["video_id"]
 
-        # Should be a valid UUID format
-        import uuid
-        try:
-            uuid.UUID(video_id)
-            valid_uuid = True
-        except ValueError:
-            valid_uuid = False
-
-        assert valid_uuid, "video_id should be a valid UUID"
+        # Should be a canonical hyphenated UUID
+        assert _UUID_RE.match(video_id), f"not a UUID: {video_id}"
 
 
 class TestStreamAnalysisEndpoint:
     """Tests for /stream-analysis SSE endpoint."""
 
-    def test_stream_analysis_with_cached_video(self, client, mock_gemini_coach_response):
+    def test_stream_analysis_with_cached_video(self, client, mock_gemini):
         """Test streaming analysis with pre-uploaded video."""
         # First upload a video
         upload_response = client.post(
@@ -55,20 +50,22 @@ class TestStreamAnalysisEndpoint:
         )
         video_id = upload_response.json()["video_id"]
 
-        # Mock Gemini response
-        mock_response = MagicMock()
-        mock_response.text = json.dumps(mock_gemini_coach_response)
+        response = client.get(
+            f"/stream-analysis?video_id={video_id}&config=club&language=en"
+        )
 
-        with patch("google.generativeai.configure"), \
-             patch("google.generativeai.GenerativeModel") as mock_model:
-            mock_model.return_value.generate_content.return_value = mock_response
+        assert response.status_code == 200
+        assert "text/event-stream" in response.headers["content-type"]
+        mock_gemini.generate_content.assert_called_once()
 
-            response = client.get(
-                f"/stream-analysis?video_id={video_id}&config=club&language=en"
-            )
+    def test_stream_analysis_disables_proxy_buffering(self, client):
+        """SSE responses opt out of caching and proxy buffering."""
+        response = client.get(
+            "/stream-analysis?video_id=nonexistent-id&config=club&language=en"
+        )
 
-            assert response.status_code == 200
-            assert "text/event-stream" in response.headers["content-type"]
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["x-accel-buffering"] == "no"
 
     def test_stream_analysis_missing_video(self, client):
         """Test streaming with non-existent video_id."""
@@ -127,3 +124,25 @@ class TestCoachResponseParsing:
         assert len(extracted_tips) == 2
         assert "Keep steady" in extracted_tips
         assert "Arm higher" in extracted_tips
+
+
+class TestHeartbeat:
+    """SSE keep-alive comments while the Coach is thinking."""
+
+    def test_heartbeat_fills_quiet_gaps(self):
+        """A comment line is emitted during a silent stretch, then events pass through in order."""
+        import asyncio
+        from main import _with_heartbeat
+
+        async def slow_events():
+            yield "data: 1\n\n"
+            await asyncio.sleep(0.05)
+            yield "data: 2\n\n"
+
+        async def collect():
+            return [chunk async for chunk in _with_heartbeat(slow_events(), interval=0.01)]
+
+        chunks = asyncio.run(collect())
+        assert chunks[0] == "data: 1\n\n"
+        assert chunks[-1] == "data: 2\n\n"
+        assert ": keep-alive\n\n" in chunks[1:-1]
@@ -1,8 +1,19 @@
 import pytest
-from unittest.mock import MagicMock, patch
+import json
+from unittest.mock import patch
 from config import Settings
+from tests._mocks import MockGemini
 import os
 
+# Serialized once per module for the agent graph test
+_MOCK_RESPONSE_TEXT = json.dumps({
+    "phases": [{"name": "Run-up", "status": "GOOD", "observation": "Good rhythm", "tip": "Keep it up"}],
+    "estimated_speed_kmh": 110,
+    "effort": "High",
+    "summary": "Good delivery",
+    "release_timestamp": 3.0
+})
+
 # 1. Tests for existing settings logic
 def test_settings_load():
     settings = Settings()
@@ -19,29 +30,11 @@ def test_extract_speed_from_text():
     assert extract_speed("SPEED_EST: 145 km/h") == "145 km/h"
 
 # 3. Test for Agent Node via Graph
-@patch("agent.genai")
-def test_agent_graph_execution(mock_genai):
-    import json
+def test_agent_graph_execution(monkeypatch):
     from agent import app_graph
 
-    # Mock upload
-    mock_file = MagicMock()
-    mock_file.state.name = "ACTIVE"
-    mock_file.name = "files/test_video"
-    mock_genai.upload_file.return_value = mock_file
-    mock_genai.get_file.return_value = mock_file
-
-    # Mock model response (JSON format as expected by agent)
-    mock_response_data = {
-        "phases": [{"name": "Run-up", "status": "GOOD", "observation": "Good rhythm", "tip": "Keep it up"}],
-        "estimated_speed_kmh": 110,
-        "effort": "High",
-        "summary": "Good delivery",
-        "release_timestamp": 3.0
-    }
-    mock_response = MagicMock()
-    mock_response.text = json.dumps(mock_response_data)
-    mock_genai.GenerativeModel.return_value.generate_content.return_value = mock_response
+    # Mock upload + model response (JSON format as expected by agent)
+    MockGemini(_MOCK_RESPONSE_TEXT).install(monkeypatch)
 
     state = {
         "messages": [],
@@ -1,12 +1,104 @@
-import re
+from dataclasses import dataclass, field
+from itertools import compress
+
+import numpy as np
 
 def extract_speed(text: str) -> str:
     """
     Extracts speeds like '120 km/h' or 'SPEED_EST: 145 km/h' from string.
     Returns '0 km/h' if not found.
     """
-    # Look for a number followed by km/h
-    match = re.search(r'(\d+)\s*km/h', text)
-    if match:
-        return f"{match.group(1)} km/h"
+    # Shortest possible hit is "9km/h"
+    if len(text) < 5:
+        return "0 km/h"
+    # Scan each '/' for a surrounding "km/h" (any case), then walk back over
+    # optional whitespace and the digit run - no regex VM on short strings.
+    i = text.find('/', 3)
+    while i != -1:
+        if text[i + 1:i + 2] in ('h', 'H') and text[i - 2:i].lower() == 'km':
+            j = i - 3
+            while j >= 0 and text[j].isspace():
+                j -= 1
+            end = j + 1
+            while j >= 0 and text[j].isdecimal():
+                j -= 1
+            if j + 1 < end:
+                return f"{text[j + 1:end]} km/h"
+        i = text.find('/', i + 1)
     return "0 km/h"
+
+
+@dataclass
+class Deliveries:
+    """
+    Scout detections stored column-wise: parallel timestamp/confidence arrays
+    (plus optional anchor descriptions), so filtering is one vectorized mask.
+    """
+    timestamps: np.ndarray
+    confidences: np.ndarray
+    anchors: list = field(default_factory=list)
+
+    @classmethod
+    def from_dicts(cls, deliveries: list) -> "Deliveries":
+        """Build from Gemini's [{timestamp, confidence, anchor?}, ...] list."""
+        return cls(
+            np.array([float(d.get("timestamp", 0)) for d in deliveries], dtype=np.float64),
+            np.array([float(d.get("confidence", 0)) for d in deliveries], dtype=np.float64),
+            [d.get("anchor", "") for d in deliveries],
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def filter_confidence(self, threshold: float) -> "Deliveries":
+        """Keep detections with confidence >= threshold."""
+        keep = self.confidences >= threshold
+        return Deliveries(
+            self.timestamps[keep],
+            self.confidences[keep],
+            list(compress(self.anchors, keep)) if self.anchors else [],
+        )
+
+    def sorted_timestamps(self) -> list:
+        """Timestamps in ascending order as plain floats."""
+        return np.sort(self.timestamps).tolist()
+
+    def as_dict_list(self) -> list:
+        """Back to [{timestamp, confidence, anchor}, ...] for response serializers."""
+        anchors = self.anchors or [""] * len(self)
+        return [
+            {"timestamp": t, "confidence": c, "anchor": a}
+            for t, c, a in zip(self.timestamps.tolist(), self.confidences.tolist(), anchors)
+        ]
+
+
+def normalize_gemini_response(result) -> dict:
+    """
+    Canonicalize any Scout response shape in one pass.
+
+    Handles the current {"deliveries_detected_at_time": [...]} format plus the
+    legacy {"deliveries": [...]}, bare-list and single {"timestamp": ...} shapes.
+    Always returns: found, deliveries ([{timestamp, confidence}, ...]),
+    total_count, timestamp and confidence (of the first delivery, or None/0.0).
+    Timestamps in the current format carry no confidence and get 1.0.
+    """
+    if isinstance(result, list):
+        deliveries = [d for d in result if d.get("found", True)]
+    elif "deliveries_detected_at_time" in result:
+        deliveries = [{"timestamp": float(t), "confidence": 1.0}
+                      for t in result["deliveries_detected_at_time"] or ()]
+    elif "deliveries" in result:
+        deliveries = result["deliveries"] or []
+    elif result.get("found"):
+        deliveries = [{"timestamp": result.get("timestamp", 0), "confidence": result.get("confidence", 0)}]
+    else:
+        deliveries = []
+
+    first = deliveries[0] if deliveries else None
+    return {
+        "found": first is not None,
+        "deliveries": deliveries,
+        "total_count": len(deliveries),
+        "timestamp": float(first.get("timestamp", 0)) if first else None,
+        "confidence": float(first.get("confidence", 0)) if first else 0.0,
+    }
@@ -1,46 +1,187 @@
 """BowlingMate Web Demo — Streamlit frontend calling the Cloud Run backend."""
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
+import hashlib
 import json
 import struct
 import time
+import uuid
+import mmap
 import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from html import escape
+from io import BytesIO
+from typing import BinaryIO
+
+# orjson is optional; stdlib json accepts the same bytes input
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 BACKEND_URL = os.getenv("BACKEND_URL", "https://bowlingmate-m4xzkste5q-uc.a.run.app")
 API_SECRET = os.getenv("API_SECRET", "bowlingmate-hackathon-secret")
 HEADERS = {"Authorization": f"Bearer {API_SECRET}"}
 MAX_UPLOAD_MB = 5
 MAX_DURATION_S = 120  # 2 minutes max
+ANALYZE_PREFETCH_TTL_S = 540  # backend drops uploaded clips after 10 min
+SSE_IDLE_TIMEOUT_S = 30  # 3x the backend's keep-alive interval
+TEMP_FILE_TTL_S = 3600  # clip/overlay temp files unused this long are swept
 
 SAMPLE_VIDEO_PATH = os.path.join(os.path.dirname(__file__), "sample_bowling_clip.mp4")
 
+# Precompiled big-endian readers (unpack_from reads at an offset, no slice copy)
+_U32 = struct.Struct('>I').unpack_from
+_U64 = struct.Struct('>Q').unpack_from
+# Box types as big-endian u32, compared as ints (no bytes object per box)
+_MOOV = 0x6D6F6F76  # b'moov'
+_MVHD = 0x6D766864  # b'mvhd'
+
+
+def _box_header(mv: memoryview, i: int, end: int) -> tuple:
+    """(size, header_len) of the box at i; size 1 = 64-bit largesize, 0 = runs to `end`."""
+    size = _U32(mv, i)[0]
+    if size == 1:
+        if i + 16 > end:
+            return 0, 16
+        return _U64(mv, i + 8)[0], 16
+    if size == 0:
+        return end - i, 8
+    return size, 8
+
+
+def _find_mvhd(mv: memoryview, start: int, end: int) -> int:
+    """Offset of the mvhd box among moov's children in [start, end), or -1."""
+    j = start
+    while j < end - 8:
+        inner_size, _ = _box_header(mv, j, end)
+        if inner_size < 8:
+            break
+        if _U32(mv, j+4)[0] == _MVHD:
+            return j
+        j += inner_size
+    return -1
+
+
 def get_mp4_duration(data: bytes) -> float:
     """Extract duration in seconds from MP4/MOV mvhd atom. Returns 0 on failure."""
-    i = 0
-    while i < len(data) - 8:
-        size = struct.unpack('>I', data[i:i+4])[0]
-        box_type = data[i+4:i+8]
-        if size < 8:
-            break
-        if box_type == b'moov':
-            j = i + 8
-            while j < i + size - 8:
-                inner_size = struct.unpack('>I', data[j:j+4])[0]
-                inner_type = data[j+4:j+8]
-                if inner_size < 8:
-                    break
-                if inner_type == b'mvhd':
-                    version = data[j+8]
-                    if version == 0:
-                        timescale = struct.unpack('>I', data[j+20:j+24])[0]
-                        duration = struct.unpack('>I', data[j+24:j+28])[0]
+    with memoryview(data) as mv:  # released on exit, so an mmap source can close
+        n = len(mv)
+        i = 0
+        while i < n - 8:
+            size, header = _box_header(mv, i, n)
+            if size < 8:
+                break
+            # Only moov matters; ftyp/mdat/free are skipped by their header size
+            if _U32(mv, i+4)[0] == _MOOV:
+                j = _find_mvhd(mv, i + header, min(i + size, n))
+                if j >= 0:
+                    if mv[j+8] == 0:
+                        timescale, duration = _U32(mv, j+20)[0], _U32(mv, j+24)[0]
                     else:
-                        timescale = struct.unpack('>I', data[j+28:j+32])[0]
-                        duration = struct.unpack('>Q', data[j+32:j+40])[0]
+                        timescale, duration = _U32(mv, j+28)[0], _U64(mv, j+32)[0]
                     return duration / timescale if timescale else 0
-                j += inner_size
-        i += size
-    return 0
+            i += size
+        return 0
+
+
+def dedupe_timestamps(timestamps: list, video_duration: float, window: float = 0.5) -> list:
+    """Sort, drop hallucinated times past the clip end, and collapse hits within `window` seconds."""
+    ts = sorted(timestamps)
+    if video_duration > 0:
+        ts = [t for t in ts if t <= video_duration + 1]
+    # Greedy against the last kept hit (not neighbour diffs), so chains like 0/0.4/0.8 keep 0.8
+    deduped = []
+    for t in ts:
+        if not deduped or t - deduped[-1] > window:
+            deduped.append(t)
+    return deduped
+
+
+def _video_fingerprint(data: bytes) -> tuple:
+    """Cheap identity for an upload: length plus its first and last 32 bytes."""
+    return len(data), data[:32], data[-32:]
+
+
+def _sweep_temp(prefix: str, max_age: float = TEMP_FILE_TTL_S):
+    """Delete our temp files (finished or .part) unused for `max_age` seconds; Cloud Run's /tmp is RAM.
+
+    Keys off mtime, which touch_clip bumps on every rerun that still holds the file.
+    """
+    cutoff = time.time() - max_age
+    for entry in os.scandir(tempfile.gettempdir()):
+        if entry.name.startswith(prefix):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                pass  # already gone, or swept by another session
+
+
+def save_clip(src: BinaryIO, owner: str) -> str:
+    """Copy an upload into a temp file named by owner and content digest; session state keeps only the path.
+
+    The owner (one per session) keeps sessions off each other's files, so discard_clip can't pull
+    a clip out from under another session that uploaded the same video.
+    """
+    _sweep_temp("bowlingmate_clip_")
+    digest = hashlib.blake2b(digest_size=16)
+    src.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="bowlingmate_clip_", suffix=".part", delete=False) as tmp:
+        try:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    path = os.path.join(tempfile.gettempdir(), f"bowlingmate_clip_{owner}_{digest.hexdigest()}.mp4")
+    os.replace(tmp.name, path)  # a re-upload of the same clip in this session lands on the same file
+    return path
+
+
+def touch_clip(path: str) -> bool:
+    """Mark the clip as in use so _sweep_temp spares it; False if it is already gone."""
+    if path == SAMPLE_VIDEO_PATH:
+        return True
+    try:
+        os.utime(path)
+    except OSError:
+        return False
+    return True
+
+
+def discard_clip(path: str | None):
+    """Delete an upload's temp file (never the bundled sample)."""
+    if path and path != SAMPLE_VIDEO_PATH:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def map_clip(path: str):
+    """Read-only mmap of the clip: a zero-copy bytes-like view served from the page cache."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+
+def get_mp4_duration_cached(data: bytes) -> float:
+    """get_mp4_duration, remembered per video in session state across reruns."""
+    cache = st.session_state.setdefault("_duration_cache", {})
+    key = _video_fingerprint(data)
+    if key not in cache:
+        cache[key] = get_mp4_duration(data)
+    return cache[key]
 
 
 CHAT_CHIPS = [
@@ -54,7 +195,7 @@ CHAT_CHIPS = [
 st.set_page_config(page_title="BowlingMate", page_icon="🏏", layout="centered")
 
 # ── Custom CSS ──
-st.markdown("""
+_CSS = """
 <style>
     .stApp { max-width: 800px; margin: 0 auto; }
     .phase-good { background: #f5f0e8; border-left: 4px solid #5a7247; padding: 12px; border-radius: 6px; margin: 8px 0; color: #2c2c2c; }
@@ -63,100 +204,378 @@ st.markdown("""
     .speed-badge { background: #3b5249; color: #f5f0e8;
         padding: 8px 20px; border-radius: 20px; display: inline-block; font-size: 1.3em; font-weight: bold; }
     .metric-row { display: flex; gap: 12px; margin: 12px 0; }
+    .chat-user { background: #eef2ea; padding: 8px 12px; border-radius: 6px; margin: 6px 0 6px 15%; color: #2c2c2c; }
+    .chat-assistant { background: #f5f0e8; padding: 8px 12px; border-radius: 6px; margin: 6px 15% 6px 0; color: #2c2c2c; }
     .metric-card { flex: 1; background: #f5f0e8; padding: 12px; border-radius: 6px; text-align: center; color: #2c2c2c; }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.html(_CSS)
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One keep-alive session per server process (module globals reset on every rerun)."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    # Status retries cover Cloud Run cold starts; urllib3 only replays idempotent methods, never the POST uploads
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """Background pool for speculative uploads, shared across reruns."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+class _Uncached(Exception):
+    """Carries a Scout result out of _scout_cached without caching it."""
+
+    def __init__(self, result: dict):
+        super().__init__("uncached scout result")
+        self.result = result
+
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def _scout_cached(video_hash: str, _video_path: str, filename: str) -> dict:
+    result = call_scout_and_analyze(_video_path, filename)
+    video_id = result.pop("video_id", None)  # single use, so never part of the cached value
+    if video_id:
+        _set_analyze_video_id(video_id)
+    # Empty or errored scans are retried next time rather than pinned for an hour
+    if not result.get("found") or "error" in result:
+        raise _Uncached(result)
+    return result
 
 
-def call_scout(video_bytes: bytes, filename: str) -> dict:
-    """POST /detect-action — find delivery timestamps."""
-    resp = requests.post(
-        f"{BACKEND_URL}/detect-action",
-        headers=HEADERS,
-        files={"file": (filename, video_bytes, "video/mp4")},
-        timeout=120,
+def cached_scout(video_path: str, filename: str) -> dict:
+    """Scout result for this clip, shared across sessions for an hour (keyed by a blake2b digest)."""
+    with map_clip(video_path) as mm:
+        video_hash = hashlib.blake2b(mm, digest_size=16).hexdigest()
+    try:
+        return _scout_cached(video_hash, video_path, filename)
+    except _Uncached as e:
+        return e.result
+
+
+def _post_video(path: str, field: str, filename: str, video: bytes | str, timeout: int,
+                session: requests.Session = None) -> requests.Response:
+    """POST the clip as multipart, streamed from the buffer or file path (no joined body copy)."""
+    if isinstance(video, str):
+        with open(video, "rb") as f:
+            return _post_video(path, field, filename, f, timeout, session)
+    stream = BytesIO(video) if isinstance(video, (bytes, bytearray)) else video
+    enc = MultipartEncoder(fields={field: (filename, stream, "video/mp4")})
+    resp = (session or get_session()).post(
+        f"{BACKEND_URL}{path}",
+        headers={"Content-Type": enc.content_type},
+        data=enc,
+        timeout=timeout,
     )
     resp.raise_for_status()
-    return resp.json()
+    return resp
 
 
-def call_analyze(video_bytes: bytes) -> str:
-    """POST /analyze — submit for Expert analysis, return video_id."""
-    resp = requests.post(
-        f"{BACKEND_URL}/analyze",
-        headers=HEADERS,
-        files={"video": ("clip.mp4", video_bytes, "video/mp4")},
-        timeout=30,
-    )
-    resp.raise_for_status()
-    return resp.json()["video_id"]
+def call_scout(video: bytes | str, filename: str) -> dict:
+    """POST /detect-action — find delivery timestamps."""
+    return _loads(_post_video("/detect-action", "file", filename, video, timeout=120).content)
+
+
+def call_scout_and_analyze(video: bytes | str, filename: str) -> dict:
+    """POST /scout-and-analyze — Scout result plus a video_id, from one upload.
+
+    Falls back to /detect-action on backends that predate the combined endpoint.
+    """
+    try:
+        return _loads(_post_video("/scout-and-analyze", "file", filename, video, timeout=120).content)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+    return call_scout(video, filename)
+
+
+def call_analyze(video: bytes | str, session: requests.Session = None) -> str:
+    """POST /analyze — submit for Expert analysis, return video_id. `video` is bytes or a file path."""
+    return _loads(_post_video("/analyze", "video", "clip.mp4", video, timeout=30, session=session).content)["video_id"]
+
+
+def _set_analyze_video_id(video_id: str):
+    """Record a video_id the backend already holds, as an already-finished prefetch."""
+    future = Future()
+    future.set_result(video_id)
+    st.session_state["_analyze_future"] = future
+    st.session_state["_analyze_started"] = time.monotonic()
+
+
+def prefetch_analyze():
+    """Start the /analyze upload in the background while the user reviews Scout results."""
+    started = st.session_state.get("_analyze_started")
+    if started is not None and time.monotonic() - started < ANALYZE_PREFETCH_TTL_S:
+        return  # Scout already registered this clip (or an upload is in flight)
+    # Session is resolved here: worker threads have no Streamlit script context
+    st.session_state["_analyze_future"] = get_executor().submit(
+        call_analyze, st.session_state.video_path, get_session())
+    st.session_state["_analyze_started"] = time.monotonic()
+
+
+def take_analyze_video_id() -> str:
+    """video_id from the prefetched upload if still fresh, else upload now. Single use."""
+    future = st.session_state.pop("_analyze_future", None)
+    started = st.session_state.pop("_analyze_started", 0.0)
+    if future is not None and time.monotonic() - started < ANALYZE_PREFETCH_TTL_S:
+        try:
+            return future.result()
+        except Exception:
+            pass  # fall back to a foreground upload
+    return call_analyze(st.session_state.video_path)
+
+
+def cancel_prefetch():
+    future = st.session_state.pop("_analyze_future", None)
+    st.session_state.pop("_analyze_started", None)
+    if future is not None:
+        future.cancel()
+
+
+def _iter_sse_data(resp: requests.Response):
+    """Yield each SSE `data: ` payload as bytes, splitting events on raw bytes (no per-line decode)."""
+    buf = bytearray()
+    for chunk in resp.iter_content(chunk_size=8192):
+        buf += chunk
+        start = 0
+        while (end := buf.find(b"\n\n", start)) != -1:
+            for line in buf[start:end].split(b"\n"):
+                if line.startswith(b"data: "):
+                    yield line[6:]
+            start = end + 2
+        del buf[:start]
+    # Trailing event without the blank-line terminator
+    for line in buf.split(b"\n"):
+        if line.startswith(b"data: "):
+            yield line[6:]
 
 
 def stream_analysis(video_id: str) -> dict:
     """GET /stream-analysis — consume SSE, return final result."""
-    resp = requests.get(
+    resp = get_session().get(
         f"{BACKEND_URL}/stream-analysis",
-        headers=HEADERS,
         params={"video_id": video_id, "generate_overlay": "true"},
+        # identity: a compressing proxy would hold events back to fill its gzip window
+        headers={"Accept": "text/event-stream", "Accept-Encoding": "identity", "Cache-Control": "no-cache"},
         stream=True,
-        timeout=300,
+        # Read timeout is per chunk; the backend sends a keep-alive comment every 10 s while busy
+        timeout=(5, SSE_IDLE_TIMEOUT_S),
     )
     resp.raise_for_status()
     result = {}
-    for line in resp.iter_lines(decode_unicode=True):
-        if not line or not line.startswith("data: "):
-            continue
-        payload = line[6:]
+    with resp:  # closes the connection when we stop reading early
         try:
-            data = json.loads(payload)
-        except json.JSONDecodeError:
-            continue
-        if data.get("status") == "success":
-            result = data
-        elif data.get("status") == "overlay":
-            result["overlay_url"] = data.get("overlay_url")
+            for payload in _iter_sse_data(resp):
+                try:
+                    data = _loads(payload)
+                except ValueError:  # json and orjson decode errors both subclass it
+                    continue
+                status = data.get("status")
+                if status == "success":
+                    result = data
+                elif status == "overlay":
+                    result["overlay_url"] = data.get("overlay_url")
+                    break  # last event the backend sends
+                elif status == "error":
+                    break
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):  # idle timeout / dropped stream
+            if not result:
+                raise RuntimeError("Analysis stream stalled or dropped before a result arrived") from None
+            # Analysis already arrived; only the overlay is lost
     return result
 
 
-def call_chat(message: str, delivery_id: str, phases: list) -> dict:
-    """POST /chat — interactive follow-up."""
-    resp = requests.post(
-        f"{BACKEND_URL}/chat",
-        headers=HEADERS,
-        json={"message": message, "delivery_id": delivery_id, "phases": phases},
-        timeout=30,
-    )
+def call_chat(message: str, delivery_id: str, phases: list, send_phases: bool = True) -> dict:
+    """POST /chat — interactive follow-up. With send_phases=False the backend's stored phases are used."""
+    body = {"message": message, "delivery_id": delivery_id}
+    if send_phases:
+        body["phases"] = phases
+    resp = get_session().post(f"{BACKEND_URL}/chat", json=body, timeout=30)
+    if resp.status_code == 409 and not send_phases:
+        # This backend instance doesn't have them (restart, or another Cloud Run instance)
+        body["phases"] = phases
+        resp = get_session().post(f"{BACKEND_URL}/chat", json=body, timeout=30)
     resp.raise_for_status()
-    return resp.json()
-
-
-def render_phases(phases: list):
+    return _loads(resp.content)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_chat(message: str, delivery_id: str, phases_key: str, _phases: list, _send_phases: bool) -> dict:
+    """call_chat, memoized per (delivery, phases, question). Pure: session bookkeeping stays in send_chat."""
+    return call_chat(message, delivery_id, _phases, _send_phases)
+
+
+def send_chat(text: str, phases: list):
+    """Append the user turn and the Expert's reply to the chat, then rerun."""
+    messages = st.session_state.chat_messages
+    messages.append({"role": "user", "content": text})
+    try:
+        delivery_id = st.session_state.delivery_id
+        # Phases go up once per delivery; the backend keeps them
+        sent = st.session_state.setdefault("_phases_sent", set())
+        phases_key = hashlib.blake2b(json.dumps(phases, sort_keys=True).encode(), digest_size=16).hexdigest()
+        chat_resp = cached_chat(text, delivery_id, phases_key, phases, delivery_id not in sent)
+        sent.add(delivery_id)  # a hit too: only a /chat that got these phases for this delivery was cached
+        reply = chat_resp.get("text", "Sorry, I couldn't generate a response.")
+        video_action = chat_resp.get("video_action")
+        msg = {"role": "assistant", "content": reply}
+        if video_action:
+            msg["video_action"] = video_action
+            st.session_state.video_seek = video_action.get("timestamp", 0)
+        messages.append(msg)
+    except Exception as e:
+        messages.append({"role": "assistant", "content": f"Error: {e}"})
+    st.rerun(scope="fragment")
+
+
+def fetch_overlay(overlay_url: str) -> str:
+    """Stream the (auth-protected) overlay video to a temp file; return its path. Raises on HTTP errors.
+
+    The file, named by URL, is the cache: checked on every call (not memoized), so a swept file is refetched.
+    """
+    name = "bowlingmate_overlay_" + hashlib.sha1(overlay_url.encode()).hexdigest()[:16] + ".mp4"
+    path = os.path.join(tempfile.gettempdir(), name)
+    if touch_clip(path):  # bumps mtime so the sweep keys off last use
+        return path
+    _sweep_temp("bowlingmate_overlay_")
+    with get_session().get(overlay_url, stream=True, timeout=30) as resp:
+        resp.raise_for_status()  # not cached, so a later rerun retries
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix="bowlingmate_overlay_",
+                                         suffix=".part", delete=False) as tmp:
+            try:
+                resp.raw.decode_content = True  # undo any Content-Encoding, as .content would
+                shutil.copyfileobj(resp.raw, tmp)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)  # no half-written .part left behind
+                raise
+    os.replace(tmp.name, path)
+    return path
+
+
+_PHASE_TPL = (
+    '<div class="{cls}">'
+    '<div class="phase-title">{icon} {name} — {status}</div>'
+    '<div style="margin-top:6px; color:#4a4a4a;">{obs}</div>'
+    '<div style="margin-top:6px; color:#5a7247;"><b>Tip:</b> {tip}</div>'
+    '</div>'
+)
+
+# Template slot -> phase key; values are HTML-escaped model output
+_PHASE_TEXT_FIELDS = (("name", "name"), ("status", "status"), ("obs", "observation"), ("tip", "tip"))
+
+
+def _phase_fields(phase: dict) -> dict:
+    """Slot values for _PHASE_TPL.format_map."""
+    is_good = phase.get("status") == "GOOD"
+    fields = {slot: escape(str(phase.get(key, ""))) for slot, key in _PHASE_TEXT_FIELDS}
+    fields["cls"] = "phase-good" if is_good else "phase-bad"
+    fields["icon"] = "✅" if is_good else "⚠️"
+    return fields
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _phases_html(delivery_id: str, _phases: list) -> str:
+    """Phase cards (GOOD first) as one HTML string, built once per delivery."""
+    good, needs_work = [], []
+    for p in _phases:
+        (good if p.get("status") == "GOOD" else needs_work).append(p)
+    return "".join(_PHASE_TPL.format_map(_phase_fields(p)) for p in good + needs_work)
+
+
+def render_phases(phases: list, delivery_id: str):
     """Render the 6-phase analysis cards."""
-    good = [p for p in phases if p.get("status") == "GOOD"]
-    needs_work = [p for p in phases if p.get("status") != "GOOD"]
-    sorted_phases = good + needs_work
-
-    for phase in sorted_phases:
-        css_class = "phase-good" if phase.get("status") == "GOOD" else "phase-bad"
-        icon = "✅" if phase.get("status") == "GOOD" else "⚠️"
-        st.markdown(f"""
-        <div class="{css_class}">
-            <div class="phase-title">{icon} {phase['name']} — {phase.get('status', '')}</div>
-            <div style="margin-top:6px; color:#4a4a4a;">{phase.get('observation', '')}</div>
-            <div style="margin-top:6px; color:#5a7247;"><b>Tip:</b> {phase.get('tip', '')}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(_phases_html(delivery_id, phases), unsafe_allow_html=True)
+
+
+def _action_caption(action: dict | None) -> str:
+    """Caption for an assistant turn that moved the video, or ''."""
+    if not action:
+        return ""
+    return f"Video: {action.get('action', 'focus')} at {action.get('timestamp', 0):.1f}s"
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _history_markdown(turns: tuple) -> str:
+    """(role, content, caption) turns as one block; content is escaped but still renders as markdown."""
+    parts = []
+    for role, content, caption in turns:
+        body = escape(content)
+        if caption:
+            body += f"\n\n*{escape(caption)}*"
+        parts.append(f'<div class="chat-{role}">\n\n{body}\n\n</div>')
+    return "\n\n".join(parts)
+
+
+def _take_chip():
+    st.session_state._chip_pending = st.session_state.chip_pick
+    st.session_state.chip_pick = None
+
+
+@st.fragment
+def chat_section(phases: list):
+    """Chat history, phase chips and free text; reruns alone so the cards, videos and overlay above stay put."""
+    # Video action indicator
+    if st.session_state.video_seek is not None and st.session_state.video_seek > 0:
+        st.info(f"On iOS: video loops in slow-motion at {st.session_state.video_seek:.1f}s and the expert advice is given")
+
+    # Chat history: earlier turns as one cached block, the newest turn as real chat messages
+    messages = st.session_state.chat_messages
+    split = max(len(messages) - 2, 0)
+    if split:
+        earlier = tuple((m["role"], m["content"], _action_caption(m.get("video_action"))) for m in messages[:split])
+        st.markdown(_history_markdown(earlier), unsafe_allow_html=True)
+    for msg in messages[split:]:
+        with st.chat_message(msg["role"]):
+            st.write(msg["content"])
+            caption = _action_caption(msg.get("video_action"))
+            if caption:
+                st.caption(caption)
+
+    # Chips: one pills widget; the callback takes the pick and clears it so it acts like a button
+    st.pills("**Ask about a specific phase:**", CHAT_CHIPS, key="chip_pick", on_change=_take_chip)
+    chip = st.session_state.pop("_chip_pending", None)
+    if chip:
+        send_chat(chip, phases)
+
+    # Free text
+    user_input = st.chat_input("Ask anything about your delivery...")
+    if user_input:
+        send_chat(user_input, phases)
 
 
 # ── Session state init ──
-for key in ["video_bytes", "video_name", "scout_result", "analysis_result",
-            "video_id", "delivery_id", "chat_messages", "step", "video_seek"]:
-    if key not in st.session_state:
-        st.session_state[key] = None
-if st.session_state.step is None:
-    st.session_state.step = "upload"
-if st.session_state.chat_messages is None:
-    st.session_state.chat_messages = []
+# Callables are factories, so each session (and each reset) gets its own list
+_DEFAULT_STATE = {
+    "video_path": None, "video_name": None, "scout_result": None, "analysis_result": None,
+    "video_id": None, "delivery_id": None, "chat_messages": list, "step": "upload",
+    "video_seek": None, "detect_seek": None,
+}
+# Everything tied to the current clip, cleared when it is dropped
+_CLIP_STATE = ("video_path", "video_name", "scout_result", "analysis_result",
+               "video_id", "delivery_id", "chat_messages", "detect_seek", "step")
+
+
+def reset_state(*keys: str):
+    """Put the given session keys back to their _DEFAULT_STATE values."""
+    for key in keys:
+        default = _DEFAULT_STATE[key]
+        st.session_state[key] = default() if callable(default) else default
+
+
+if "_initialized" not in st.session_state:  # paid once per session, not per rerun
+    reset_state(*_DEFAULT_STATE)
+    st.session_state._initialized = True
+    st.session_state._clip_owner = uuid.uuid4().hex
+ss = st.session_state  # one proxy lookup; the step blocks below read it heavily
 
 
 # ══════════════════════════════════════
@@ -166,21 +585,26 @@ st.title("🏏 BowlingMate")
 st.caption("AI-native cricket bowling analysis — powered by Gemini 3")
 st.warning("This is a live demo with severe rate limiting. If analysis fails, please try again in a minute.")
 
+if ss.video_path and not touch_clip(ss.video_path):
+    # Swept after sitting unused for TEMP_FILE_TTL_S
+    cancel_prefetch()
+    reset_state(*_CLIP_STATE)
+    st.info("Your clip expired after an hour idle. Please select it again.")
+
 # ── Demo Video ──
 with st.expander("Watch the iOS app demo to get a feel for it"):
     st.video("https://www.youtube.com/watch?v=Gpif-vPtYTc")
     st.caption("Full experience runs on the native iOS app — this web demo uses the same backend API.")
 
-if st.session_state.step == "upload":
+if ss.step == "upload":
     st.subheader("Select a video")
 
     col1, col2 = st.columns(2)
     with col1:
         if st.button("📎 Use Sample Clip", use_container_width=True):
-            with open(SAMPLE_VIDEO_PATH, "rb") as f:
-                st.session_state.video_bytes = f.read()
-            st.session_state.video_name = "sample_bowling_clip.mp4"
-            st.session_state.step = "detect"
+            ss.video_path = SAMPLE_VIDEO_PATH
+            ss.video_name = "sample_bowling_clip.mp4"
+            ss.step = "detect"
             st.rerun()
 
     with col2:
@@ -194,48 +618,44 @@ if st.session_state.step == "upload":
             if uploaded.size > MAX_UPLOAD_MB * 1024 * 1024:
                 st.error(f"File too large ({uploaded.size / 1024 / 1024:.1f}MB). Max {MAX_UPLOAD_MB}MB.")
             else:
-                st.session_state.video_bytes = uploaded.read()
-                st.session_state.video_name = uploaded.name
-                st.session_state.step = "detect"
+                ss.video_path = save_clip(uploaded, ss._clip_owner)
+                ss.video_name = uploaded.name
+                ss.step = "detect"
                 st.rerun()
 
 
 # ══════════════════════════════════════
 # STEP 2: Scout Detection
 # ══════════════════════════════════════
-elif st.session_state.step == "detect":
+elif ss.step == "detect":
     st.subheader("📹 Your Video")
-    st.video(st.session_state.video_bytes)
+    # One player for the whole step; the per-delivery buttons below seek it
+    st.video(ss.video_path, start_time=int(ss.detect_seek or 0))
 
-    if st.session_state.scout_result is None:
+    if ss.scout_result is None:
         with st.spinner("🔍 Scout (Gemini 3 Flash) scanning for deliveries..."):
             try:
-                result = call_scout(st.session_state.video_bytes, st.session_state.video_name)
-                timestamps = result.get("deliveries_detected_at_time", [])
+                result = cached_scout(ss.video_path, ss.video_name)
                 # Get actual video duration from MP4 header
-                video_duration = get_mp4_duration(st.session_state.video_bytes)
-                if video_duration > 0:
-                    # Filter out hallucinated timestamps beyond video length
-                    timestamps = [t for t in timestamps if t <= video_duration + 1]
-                # Deduplicate within +-0.5s
-                deduped = []
-                for t in sorted(timestamps):
-                    if not deduped or abs(t - deduped[-1]) > 0.5:
-                        deduped.append(t)
+                with map_clip(ss.video_path) as mm:
+                    video_duration = get_mp4_duration_cached(mm)
+                deduped = dedupe_timestamps(result.get("deliveries_detected_at_time", []), video_duration)
                 result["deliveries_detected_at_time"] = deduped
                 result["total_count"] = len(deduped)
                 if not deduped:
                     result["found"] = False
-                st.session_state.scout_result = result
+                else:
+                    prefetch_analyze()
+                ss.scout_result = result
                 st.rerun()
             except Exception as e:
                 st.error(f"Scout failed: {e}")
                 if st.button("← Back"):
-                    st.session_state.step = "upload"
-                    st.session_state.scout_result = None
+                    ss.step = "upload"
+                    ss.scout_result = None
                     st.rerun()
     else:
-        result = st.session_state.scout_result
+        result = ss.scout_result
         if result.get("found"):
             timestamps = result.get("deliveries_detected_at_time", [])
             st.success(f"Found **{result['total_count']}** delivery(s) at: {', '.join(f'{t:.1f}s' for t in timestamps)}")
@@ -244,26 +664,30 @@ elif st.session_state.step == "detect":
             for i, ts in enumerate(timestamps):
                 with st.container():
                     st.markdown(f"**Delivery {i + 1}** — detected at {ts:.1f}s")
-                    st.video(st.session_state.video_bytes, start_time=int(ts))
-                    if st.button(f"Analyze Delivery {i + 1}", key=f"analyze_{i}", use_container_width=True):
-                        st.session_state.step = "analyze"
-                        st.rerun()
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button(f"▶ Watch from {int(ts)}s", key=f"seek_{i}", use_container_width=True):
+                            ss.detect_seek = ts
+                            st.rerun()
+                    with col2:
+                        if st.button(f"Analyze Delivery {i + 1}", key=f"analyze_{i}", use_container_width=True):
+                            ss.step = "analyze"
+                            st.rerun()
         else:
             st.warning("No deliveries detected. Try a different video.")
 
         if st.button("← Choose another video"):
-            for key in ["video_bytes", "video_name", "scout_result", "analysis_result",
-                        "video_id", "delivery_id", "chat_messages"]:
-                st.session_state[key] = None
-            st.session_state.step = "upload"
+            cancel_prefetch()
+            discard_clip(ss.video_path)
+            reset_state(*_CLIP_STATE)
             st.rerun()
 
 
 # ══════════════════════════════════════
 # STEP 3: Expert Analysis
 # ══════════════════════════════════════
-elif st.session_state.step == "analyze":
-    if st.session_state.analysis_result is None:
+elif ss.step == "analyze":
+    if ss.analysis_result is None:
         st.subheader("🧠 Expert Analysis")
         status_text = st.empty()
         progress_bar = st.progress(0)
@@ -271,9 +695,9 @@ elif st.session_state.step == "analyze":
         try:
             status_text.markdown("**Uploading clip to Expert (Gemini 3 Pro)...**")
             progress_bar.progress(10)
-            video_id = call_analyze(st.session_state.video_bytes)
-            st.session_state.video_id = video_id
-            st.session_state.delivery_id = video_id
+            video_id = take_analyze_video_id()
+            ss.video_id = video_id
+            ss.delivery_id = video_id
 
             status_text.markdown("**Expert AI (Gemini 3 Pro) Thinking...**")
             progress_bar.progress(30)
@@ -282,28 +706,27 @@ elif st.session_state.step == "analyze":
             progress_bar.progress(90)
 
             if result:
-                st.session_state.analysis_result = result
+                ss.analysis_result = result
                 progress_bar.progress(100)
-                time.sleep(0.3)
                 st.rerun()
             else:
                 st.error("Analysis returned empty. Try again.")
                 if st.button("← Back"):
-                    st.session_state.step = "detect"
+                    ss.step = "detect"
                     st.rerun()
 
         except Exception as e:
             st.error(f"Expert analysis failed: {e}")
             if st.button("← Back"):
-                st.session_state.step = "detect"
+                ss.step = "detect"
                 st.rerun()
     else:
-        result = st.session_state.analysis_result
+        result = ss.analysis_result
 
         # ── Summary ──
         st.subheader("📊 Analysis Summary")
 
-        st.video(st.session_state.video_bytes)
+        st.video(ss.video_path)
 
         # Speed + effort
         col1, col2, col3 = st.columns(3)
@@ -334,7 +757,7 @@ elif st.session_state.step == "analyze":
         # ── Expert Phases ──
         st.subheader("🔬 Expert Breakdown (6 Phases)")
         phases = result.get("phases", [])
-        render_phases(phases)
+        render_phases(phases, ss.delivery_id)
 
         st.divider()
 
@@ -344,17 +767,14 @@ elif st.session_state.step == "analyze":
             st.subheader("🦴 Skeleton Overlay")
             st.caption("MediaPipe pose detection — Green: good, Red: injury risk, Yellow: needs work")
             try:
-                overlay_resp = requests.get(overlay_url, headers=HEADERS, timeout=30)
-                if overlay_resp.status_code == 200:
-                    st.video(overlay_resp.content)
-                else:
-                    st.warning("Overlay video not yet available.")
+                st.video(fetch_overlay(overlay_url))
+            except requests.HTTPError:
+                st.warning("Overlay video not yet available.")
             except Exception:
                 st.warning("Could not load overlay video.")
         else:
-            with st.spinner("⏳ Generating skeleton overlay..."):
-                time.sleep(2)
-                st.caption("Overlay generation may take up to 60 seconds. Refresh to check.")
+            # The overlay URL arrives on the analysis stream itself; once that has closed, none is coming
+            st.caption("Skeleton overlay was not generated for this delivery.")
 
         st.divider()
 
@@ -362,66 +782,13 @@ elif st.session_state.step == "analyze":
         st.subheader("💬 Ask the Expert")
         st.caption("The Expert references specific moments in your delivery and controls video playback — powered by Gemini 3 Pro function calling.")
 
-        # Video action indicator
-        if st.session_state.video_seek is not None and st.session_state.video_seek > 0:
-            st.info(f"On iOS: video loops in slow-motion at {st.session_state.video_seek:.1f}s and the expert advice is given")
-
-        # Chat history
-        for msg in st.session_state.chat_messages:
-            if msg["role"] == "user":
-                st.chat_message("user").write(msg["content"])
-            else:
-                content = msg["content"]
-                action = msg.get("video_action")
-                with st.chat_message("assistant"):
-                    st.write(content)
-                    if action:
-                        ts = action.get("timestamp", 0)
-                        st.caption(f"Video: {action.get('action', 'focus')} at {ts:.1f}s")
-
-        # Chips
-        st.markdown("**Ask about a specific phase:**")
-        chip_cols = st.columns(2)
-        for i, chip in enumerate(CHAT_CHIPS):
-            col = chip_cols[i % 2]
-            with col:
-                if st.button(chip, key=f"chip_{i}", use_container_width=True):
-                    st.session_state.chat_messages.append({"role": "user", "content": chip})
-                    try:
-                        chat_resp = call_chat(chip, st.session_state.delivery_id, phases)
-                        reply = chat_resp.get("text", "Sorry, I couldn't generate a response.")
-                        video_action = chat_resp.get("video_action")
-                        msg = {"role": "assistant", "content": reply}
-                        if video_action:
-                            msg["video_action"] = video_action
-                            st.session_state.video_seek = video_action.get("timestamp", 0)
-                        st.session_state.chat_messages.append(msg)
-                    except Exception as e:
-                        st.session_state.chat_messages.append({"role": "assistant", "content": f"Error: {e}"})
-                    st.rerun()
-
-        # Free text
-        user_input = st.chat_input("Ask anything about your delivery...")
-        if user_input:
-            st.session_state.chat_messages.append({"role": "user", "content": user_input})
-            try:
-                chat_resp = call_chat(user_input, st.session_state.delivery_id, phases)
-                reply = chat_resp.get("text", "Sorry, I couldn't generate a response.")
-                video_action = chat_resp.get("video_action")
-                msg = {"role": "assistant", "content": reply}
-                if video_action:
-                    msg["video_action"] = video_action
-                    st.session_state.video_seek = video_action.get("timestamp", 0)
-                st.session_state.chat_messages.append(msg)
-            except Exception as e:
-                st.session_state.chat_messages.append({"role": "assistant", "content": f"Error: {e}"})
-            st.rerun()
+        chat_section(phases)
 
         st.divider()
         if st.button("← Analyze another delivery", use_container_width=True):
-            st.session_state.analysis_result = None
-            st.session_state.chat_messages = []
-            st.session_state.step = "detect"
+            prefetch_analyze()  # the previous video_id was consumed by the stream
+            reset_state("analysis_result", "chat_messages")
+            ss.step = "detect"
             st.rerun()
 
 